@@ -14,11 +14,80 @@ class Settings(BaseSettings):
 
     APP_PORT: int = settings.APP_PORT
 
+    DB_POOL_SIZE: int = settings.DB_POOL_SIZE
+    DB_MAX_OVERFLOW: int = settings.DB_MAX_OVERFLOW
+    DB_POOL_TIMEOUT: float = settings.DB_POOL_TIMEOUT
+    DB_POOL_RECYCLE: int = settings.DB_POOL_RECYCLE
+    DB_POOL_PRE_PING: bool = settings.DB_POOL_PRE_PING
+    DATABASE_REPLICA_URLS: list[str] = settings.DATABASE_REPLICA_URLS
+    READ_YOUR_WRITES_WINDOW_SECONDS: float = settings.READ_YOUR_WRITES_WINDOW_SECONDS
+    READ_YOUR_WRITES_MAX_ENTRIES: int = settings.READ_YOUR_WRITES_MAX_ENTRIES
+    DB_HEDGED_READS: bool = settings.DB_HEDGED_READS
+    DB_HEDGE_PERCENTILE: float = settings.DB_HEDGE_PERCENTILE
+    DB_HEDGE_MIN_DELAY_SECONDS: float = settings.DB_HEDGE_MIN_DELAY_SECONDS
+
     SECRET_KEY_FOR_ACCESS: str = settings.SECRET_KEY_FOR_ACCESS
     SECRET_KEY_FOR_REFRESH: str = settings.SECRET_KEY_FOR_REFRESH
     ALGORITHM: str = settings.ALGORITHM
+    ACCESS_TOKEN_PRIVATE_KEY_PATH: str = settings.ACCESS_TOKEN_PRIVATE_KEY_PATH
+    ACCESS_TOKEN_KEY_ID: str = settings.ACCESS_TOKEN_KEY_ID
+    REFRESH_TOKEN_ALGORITHM: str = settings.REFRESH_TOKEN_ALGORITHM
+    JWT_KEYRING_PATH: str = settings.JWT_KEYRING_PATH
+    JWT_KEYRING_RELOAD_INTERVAL_SECONDS: int = (
+        settings.JWT_KEYRING_RELOAD_INTERVAL_SECONDS
+    )
+    JWKS_MAX_AGE_SECONDS: int = settings.JWKS_MAX_AGE_SECONDS
     ACCESS_TOKEN_EXPIRE_MINUTES: int = settings.ACCESS_TOKEN_EXPIRE_MINUTES
     REFRESH_TOKEN_EXPIRE_DAYS: int = settings.REFRESH_TOKEN_EXPIRE_DAYS
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: float = (
+        settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS
+    )
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE
+    ACCESS_TOKEN_CACHE_MAX_ENTRIES: int = settings.ACCESS_TOKEN_CACHE_MAX_ENTRIES
+    REVOCATION_REFRESH_INTERVAL_SECONDS: float = (
+        settings.REVOCATION_REFRESH_INTERVAL_SECONDS
+    )
+    REVOCATION_REFRESH_LOOKBACK_SECONDS: float = (
+        settings.REVOCATION_REFRESH_LOOKBACK_SECONDS
+    )
+    REVOCATION_BLOOM_CAPACITY: int = settings.REVOCATION_BLOOM_CAPACITY
+    REVOCATION_BLOOM_ERROR_RATE: float = settings.REVOCATION_BLOOM_ERROR_RATE
+    INTROSPECTION_MAX_TOKENS: int = settings.INTROSPECTION_MAX_TOKENS
+    BORROWED_BOOKS_BATCH_MAX_USERS: int = settings.BORROWED_BOOKS_BATCH_MAX_USERS
+    USER_WRITE_BEHIND: bool = settings.USER_WRITE_BEHIND
+    USER_WRITE_BEHIND_INTERVAL_SECONDS: float = (
+        settings.USER_WRITE_BEHIND_INTERVAL_SECONDS
+    )
+    USER_WRITE_BEHIND_MAX_ENTRIES: int = settings.USER_WRITE_BEHIND_MAX_ENTRIES
+    USER_WRITE_BEHIND_MAX_PENDING: int = settings.USER_WRITE_BEHIND_MAX_PENDING
+    ACCESS_TOKEN_COMPACT_CLAIMS: bool = settings.ACCESS_TOKEN_COMPACT_CLAIMS
+    USER_CLAIMS_CACHE_TTL_SECONDS: int = settings.USER_CLAIMS_CACHE_TTL_SECONDS
+    USER_CLAIMS_CACHE_MAX_ENTRIES: int = settings.USER_CLAIMS_CACHE_MAX_ENTRIES
+    USER_VERSIONS_REFRESH_INTERVAL_SECONDS: float = (
+        settings.USER_VERSIONS_REFRESH_INTERVAL_SECONDS
+    )
+    USER_VERSIONS_REFRESH_LOOKBACK_SECONDS: float = (
+        settings.USER_VERSIONS_REFRESH_LOOKBACK_SECONDS
+    )
+    AUTH_STATELESS_PRINCIPAL: bool = settings.AUTH_STATELESS_PRINCIPAL
+
+    SERVICE_CLIENT_SECRET_KEY: str = settings.SERVICE_CLIENT_SECRET_KEY
+    SERVICE_TOKEN_EXPIRE_MINUTES: int = settings.SERVICE_TOKEN_EXPIRE_MINUTES
+    SERVICE_TOKEN_CACHE_MAX_ENTRIES: int = settings.SERVICE_TOKEN_CACHE_MAX_ENTRIES
+
+    PASSWORD_HASH_SCHEMES: list[str] = settings.PASSWORD_HASH_SCHEMES
+    BCRYPT_ROUNDS: int = settings.BCRYPT_ROUNDS
+    BCRYPT_MIN_ROUNDS: int = settings.BCRYPT_MIN_ROUNDS
+    BCRYPT_MAX_ROUNDS: int = settings.BCRYPT_MAX_ROUNDS
+    HASHING_TARGET_MS: int = settings.HASHING_TARGET_MS
+    HASHING_CALIBRATE_ON_STARTUP: bool = settings.HASHING_CALIBRATE_ON_STARTUP
+    HASHING_THREAD_POOL_SIZE: int = settings.HASHING_THREAD_POOL_SIZE
+
+    LOGIN_MAX_CONCURRENT_VERIFICATIONS: int = (
+        settings.LOGIN_MAX_CONCURRENT_VERIFICATIONS
+    )
+    LOGIN_MAX_QUEUE_WAIT_SECONDS: float = settings.LOGIN_MAX_QUEUE_WAIT_SECONDS
+    LOGIN_RETRY_AFTER_SECONDS: int = settings.LOGIN_RETRY_AFTER_SECONDS
 
 
 @lru_cache()
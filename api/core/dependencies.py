@@ -1,14 +1,24 @@
 from fastapi import Depends
+from fastapi import Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
+from api.v1.auth.schemas import TokenPrincipal
 from api.v1.users.actions import get_user_by_email_action
 from db.session import async_session
+from db.session import track_writer
 from utils.jwt import JWT
+from utils.revocation import revocation_list
+from utils.user_versions import user_versions
+
+settings = get_settings()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
 
 async def get_session():
     """Dependency for getting async session"""
@@ -19,13 +29,51 @@ async def get_session():
         await session.close()
 
 
+async def get_unit_of_work(
+    request: Request, session: AsyncSession = Depends(get_session)
+):
+    """Session whose actions share one lazily started transaction.
+
+    The transaction is committed once after the route returns and rolled
+    back if it raises. Routes of safe methods get a READ ONLY transaction.
+    """
+    session.info["unit_of_work"] = True
+    session.info["read_only"] = request.method in READ_ONLY_METHODS
+    yield session
+    await session.commit()
+
+
 async def get_current_user_from_access_token(
     token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
 ):
     payload = await JWT.decode_jwt_token(token, "access")
     email: str = payload.get("sub")
+    track_writer(session, email)
+    await revocation_list.refresh(session)
+    if revocation_list.is_revoked(payload):
+        AppExceptions.unauthorized_exception("Could not validate credentials")
+    if settings.AUTH_STATELESS_PRINCIPAL:
+        await user_versions.refresh(session)
+        principal = TokenPrincipal.from_claims(payload)
+        # A changed user is loaded from the database instead of stale claims.
+        if principal is not None and not user_versions.is_stale(
+            principal.user_id, principal.version, payload.get("iat")
+        ):
+            return principal
     user = await get_user_by_email_action(email=email, session=session)
-    if user is None:
+    if user is None or revocation_list.is_revoked(payload, user.user_id):
         AppExceptions.unauthorized_exception("Could not validate credentials")
     return user
+
+
+def require_service_scope(scope: str):
+    """Dependency that accepts only service tokens granted the given scope"""
+
+    async def get_service_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+        payload = await JWT.decode_jwt_token(token, "access")
+        if scope not in payload.get("scope", "").split():
+            AppExceptions.forbidden_exception()
+        return payload
+
+    return get_service_token_payload
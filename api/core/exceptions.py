@@ -40,12 +40,17 @@ class AppExceptions:
         raise HTTPException(status_code=422, detail=message)
 
     @staticmethod
-    def service_unavailable_exception(message: str):
-        raise HTTPException(status_code=503, detail=message)
+    def service_unavailable_exception(message: str, retry_after: int | None = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        raise HTTPException(status_code=503, detail=message, headers=headers)
 
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     logger.warning(
         f"HTTP Exception: {exc.detail}, Status: {exc.status_code}, Path: {request.url}"
     )
-    return JSONResponse(content={"detail": exc.detail}, status_code=exc.status_code)
+    return JSONResponse(
+        content={"detail": exc.detail},
+        status_code=exc.status_code,
+        headers=exc.headers,
+    )
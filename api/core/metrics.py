@@ -0,0 +1,81 @@
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+
+HASHING_QUEUE_DEPTH = Gauge(
+    "auth_hashing_queue_depth",
+    "Password hashing jobs waiting for a free hashing thread",
+)
+HASHING_QUEUE_WAIT_SECONDS = Histogram(
+    "auth_hashing_queue_wait_seconds",
+    "Time password hashing jobs spend waiting for a free hashing thread",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "auth_admission_in_flight",
+    "Requests currently admitted through an admission gate",
+    ["gate"],
+)
+ADMISSION_REJECTED = Counter(
+    "auth_admission_rejected_total",
+    "Requests rejected by an admission gate after exceeding the queue wait",
+    ["gate"],
+)
+
+CACHE_HITS = Counter("auth_cache_hits_total", "In-process cache hits", ["cache"])
+CACHE_MISSES = Counter("auth_cache_misses_total", "In-process cache misses", ["cache"])
+
+DB_POOL_SIZE = Gauge(
+    "auth_db_pool_size", "Configured connections kept in the pool", ["pool"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "auth_db_pool_checked_out", "Connections currently checked out", ["pool"]
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "auth_db_pool_wait_seconds",
+    "Time spent getting a connection from the pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "auth_db_pool_timeouts_total",
+    "Connection checkouts that gave up after pool_timeout",
+    ["pool"],
+)
+WRITE_BEHIND_PENDING = Gauge(
+    "auth_write_behind_pending",
+    "Keys with buffered writes waiting for the next flush",
+    ["buffer"],
+)
+WRITE_BEHIND_BATCH_SIZE = Histogram(
+    "auth_write_behind_batch_size",
+    "Keys written per write-behind flush",
+    ["buffer"],
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+WRITE_BEHIND_FLUSH_SECONDS = Histogram(
+    "auth_write_behind_flush_seconds",
+    "Time taken to apply one write-behind batch",
+    ["buffer"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+WRITE_BEHIND_REJECTED = Counter(
+    "auth_write_behind_rejected_total",
+    "Buffered writes dropped at flush because the row was missing or protected",
+    ["buffer"],
+)
+WRITE_BEHIND_OVERFLOWS = Counter(
+    "auth_write_behind_overflows_total",
+    "Writes refused with 503 because the write-behind buffer was at its cap",
+    ["buffer"],
+)
+DB_HEDGED_READS = Counter(
+    "auth_db_hedged_reads_total",
+    "Replica reads repeated on a second replica after the hedge delay",
+)
+DB_HEDGED_READS_WON = Counter(
+    "auth_db_hedged_reads_won_total",
+    "Hedged replica reads where the second replica answered first",
+)
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Form
+from fastapi import HTTPException
 from fastapi import Request
 from fastapi import Response
 from fastapi.security import OAuth2PasswordRequestForm
@@ -7,9 +9,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.core.config import get_settings
 from api.core.dependencies import get_session
+from api.core.dependencies import oauth2_scheme
+from api.core.dependencies import require_service_scope
 from api.core.exceptions import AppExceptions
+from api.v1.auth.schemas import IntrospectionRequest
+from api.v1.auth.schemas import IntrospectionResponse
+from api.v1.auth.schemas import LoginUser
+from api.v1.auth.schemas import ServiceToken
 from api.v1.auth.schemas import Token
 from api.v1.auth.services.AuthService import AuthService
+from api.v1.auth.services.ServiceClientService import ServiceClientService
+from db.session import track_writer
+from utils.jwt import JWT
 
 
 login_router = APIRouter()
@@ -17,43 +28,123 @@ login_router = APIRouter()
 settings = get_settings()
 
 
+def _set_refresh_token_cookie(response: Response, refresh_token: str) -> None:
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        secure=False,  # Not only https. Turn off in realise
+        samesite="Strict",
+        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+    )
+
+
 @login_router.post("/", response_model=Token)
 async def login_for_get_tokens(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session),
 ):
-    auth_service = await AuthService.create(
-        form_data.username, form_data.password, session
-    )
+    return await _login(response, form_data.username, form_data.password, session)
+
+
+@login_router.post("/json", response_model=Token)
+async def login_with_json_body(
+    response: Response,
+    body: LoginUser,
+    session: AsyncSession = Depends(get_session),
+):
+    return await _login(response, body.email, body.password, session)
+
+
+async def _login(
+    response: Response, email: str, password: str, session: AsyncSession
+) -> dict:
+    track_writer(session, email)
+    auth_service = await AuthService.create(email, password, session)
 
     access_token = await auth_service.create_access_token()
     refresh_token = await auth_service.create_refresh_token()
-
-    response.set_cookie(
-        key="refresh_token",
-        value=refresh_token,
-        httponly=True,
-        secure=False,  # Not only https. Turn off in realise
-        samesite="Strict",
-        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-    )
+    _set_refresh_token_cookie(response, refresh_token)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @login_router.post("/token", response_model=Token)
 async def create_new_access_token(
-    request: Request, session: AsyncSession = Depends(get_session)
+    request: Request, response: Response, session: AsyncSession = Depends(get_session)
 ):
     refresh_token = request.cookies.get("refresh_token")
     if not refresh_token:
         AppExceptions.unauthorized_exception("Could not validate credentials")
 
-    user = await AuthService.get_user_by_refresh_token(refresh_token, session)
+    rotated = await AuthService.rotate_refresh_token(refresh_token, session)
 
-    if user is None:
+    if rotated is None:
         AppExceptions.forbidden_exception()
-    auth_service = AuthService(user, session)
+    auth_service, refresh_token = rotated
     access_token = await auth_service.create_access_token()
+    _set_refresh_token_cookie(response, refresh_token)
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@login_router.post("/logout", status_code=204)
+async def logout(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_session),
+):
+    payload = await JWT.decode_jwt_token(token, "access")
+    await AuthService.revoke_access_token(payload, session)
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            await AuthService.revoke_refresh_token(refresh_token, session)
+        except HTTPException:
+            pass
+    response = Response(status_code=204)
+    response.delete_cookie(key="refresh_token", httponly=True, samesite="Strict")
+    return response
+
+
+@login_router.post("/client_token", response_model=ServiceToken)
+async def create_service_token(
+    grant_type: str = Form(),
+    client_id: str = Form(),
+    client_secret: str = Form(),
+    scope: str | None = Form(None),
+    session: AsyncSession = Depends(get_session),
+):
+    if grant_type != "client_credentials":
+        AppExceptions.bad_request_exception("Unsupported grant type.")
+    service = await ServiceClientService.create(client_id, client_secret, session)
+    scopes = service.grant_scopes(scope)
+    access_token, expires_in = await service.create_service_token(scopes)
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": expires_in,
+        "scope": " ".join(scopes),
+    }
+
+
+@login_router.post("/introspect", response_model=IntrospectionResponse)
+async def introspect_tokens(
+    body: IntrospectionRequest,
+    session: AsyncSession = Depends(get_session),
+    _service: dict = Depends(require_service_scope("introspect")),
+):
+    results = await AuthService.introspect_tokens(body.tokens, session)
+    return {"results": results}
+
+
+@login_router.get("/jwks.json")
+async def get_jwks(request: Request):
+    body, etag = JWT.get_jwks()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,11 +1,16 @@
 import re
+import uuid
 
 from pydantic import BaseModel
 from pydantic import EmailStr
+from pydantic import Field
 from pydantic import field_validator
 
+from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
+from utils.roles import PortalRole
 
+settings = get_settings()
 
 PASSWORD_REGEX = re.compile(
     r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[\W_])[A-Za-z\d\W_]{8,16}$"
@@ -29,3 +34,70 @@ class LoginUser(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+
+class ServiceToken(BaseModel):
+    access_token: str
+    token_type: str
+    expires_in: int
+    scope: str
+
+
+class IntrospectionRequest(BaseModel):
+    tokens: list[str] = Field(
+        min_length=1, max_length=settings.INTROSPECTION_MAX_TOKENS
+    )
+
+
+class IntrospectionResult(BaseModel):
+    active: bool
+    claims: dict | None = None
+
+
+class IntrospectionResponse(BaseModel):
+    results: list[IntrospectionResult]
+
+
+class TokenPrincipal(BaseModel):
+    """Authenticated user built from verified access token claims"""
+
+    user_id: uuid.UUID
+    email: str
+    roles: list[str]
+    rating: int | None = None
+    count_of_borrowed_books: int | None = None
+    is_active: bool = True
+    version: int | None = None
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "TokenPrincipal | None":
+        if "user_id" not in payload or "roles" not in payload:
+            return None
+        return cls(
+            user_id=payload["user_id"],
+            email=payload["sub"],
+            roles=payload["roles"],
+            rating=payload.get("rating"),
+            count_of_borrowed_books=payload.get("count_of_borrowed_books"),
+            version=payload.get("ver"),
+        )
+
+    @classmethod
+    def from_user(cls, user) -> "TokenPrincipal":
+        return cls(
+            user_id=user.user_id,
+            email=user.email,
+            roles=user.roles,
+            rating=user.rating,
+            count_of_borrowed_books=user.count_of_borrowed_books,
+            is_active=user.is_active,
+            version=user.version,
+        )
+
+    @property
+    def is_superadmin(self) -> bool:
+        return PortalRole.ROLE_PORTAL_SUPERADMIN in self.roles
+
+    @property
+    def is_admin(self) -> bool:
+        return PortalRole.ROLE_PORTAL_ADMIN in self.roles
@@ -1,21 +1,48 @@
+import datetime
+import uuid
+
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
+from api.core.logging.logging_app import logger
+from api.v1.auth.schemas import IntrospectionResult
+from api.v1.auth.schemas import TokenPrincipal
 from api.v1.users.actions import get_user_by_email_action
+from api.v1.users.actions import get_user_claims
+from api.v1.users.actions import rehash_password_action
+from db.dals import RefreshTokenDAL
+from db.dals import RevocationDAL
 from db.models import User
+from db.session import transaction
+from utils.admission import AdmissionGate
+from utils.claims import compact_claims
 from utils.hashing import Hasher
 from utils.jwt import JWT
+from utils.revocation import revocation_list
+from utils.user_versions import user_versions
+
+settings = get_settings()
+
+login_gate = AdmissionGate(
+    name="login",
+    max_concurrency=settings.LOGIN_MAX_CONCURRENT_VERIFICATIONS,
+    max_queue_wait=settings.LOGIN_MAX_QUEUE_WAIT_SECONDS,
+    retry_after=settings.LOGIN_RETRY_AFTER_SECONDS,
+)
 
 
 class AuthService:
 
-    def __init__(self, user: User, session: AsyncSession):
+    def __init__(self, user: User | TokenPrincipal, session: AsyncSession):
         self.user = user
         self.session = session
 
     @classmethod
     async def create(cls, email: str, password: str, session: AsyncSession):
-        user = await cls._authenticate_user(email, password, session)
+        async with login_gate.admit():
+            user = await cls._authenticate_user(email, password, session)
         if not user:
             AppExceptions.unauthorized_exception("Incorrect username or password")
         return cls(user, session)
@@ -26,34 +53,117 @@ class AuthService:
     ) -> User | None:
         user = await get_user_by_email_action(email, session)
         if user is not None:
-            if not Hasher.verify_password(password, user.hashed_password):
+            verified, new_hash = await Hasher.verify_and_update_async(
+                password, user.hashed_password
+            )
+            if not verified:
                 return None
+            if new_hash is not None:
+                await rehash_password_action(user, new_hash, session)
         return user
 
     async def create_access_token(self):
-        return await JWT.create_jwt_token(
-            data={
-                "sub": self.user.email,
-                "user_id": str(self.user.user_id),
-                "roles": self.user.roles,
-                "rating": self.user.rating,
-                "count_of_borrowed_books": self.user.count_of_borrowed_books,
-            },
-            token_type="access",
-        )
+        claims = {
+            "sub": self.user.email,
+            "user_id": str(self.user.user_id),
+            "roles": self.user.roles,
+            "rating": self.user.rating,
+            "count_of_borrowed_books": self.user.count_of_borrowed_books,
+            "ver": self.user.version,
+        }
+        if settings.ACCESS_TOKEN_COMPACT_CLAIMS:
+            claims = compact_claims(claims)
+        return await JWT.create_jwt_token(data=claims, token_type="access")
 
-    async def create_refresh_token(self):
+    async def create_refresh_token(self, family_id: uuid.UUID | None = None) -> str:
+        """Issue a stored refresh token, starting a new family on login"""
+        async with transaction(self.session):
+            return await self._store_refresh_token(family_id or uuid.uuid4())
+
+    async def _store_refresh_token(self, family_id: uuid.UUID) -> str:
+        jti = uuid.uuid4().hex
+        expires_delta = datetime.timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        await RefreshTokenDAL(self.session).create_refresh_token(
+            jti=jti,
+            family_id=family_id,
+            user_id=self.user.user_id,
+            expires_at=datetime.datetime.now(datetime.timezone.utc) + expires_delta,
+        )
         return await JWT.create_jwt_token(
-            data={"sub": self.user.email},
+            data={"sub": self.user.email, "jti": jti},
             token_type="refresh",
+            expires_delta=expires_delta,
         )
-    
+
+    @classmethod
+    async def rotate_refresh_token(
+        cls, refresh_token: str, session: AsyncSession
+    ) -> tuple["AuthService", str] | None:
+        """Exchange a refresh token for a new one of the same family.
+
+        Each refresh token can be used once. Presenting a used one means it
+        was stolen or replayed, so the whole family is revoked and the user
+        has to log in again.
+        """
+        payload = await JWT.decode_jwt_token(refresh_token, "refresh")
+        await revocation_list.refresh(session)
+        await user_versions.refresh(session)
+        if revocation_list.is_revoked(payload):
+            return None
+        jti = payload.get("jti")
+        async with transaction(session):
+            refresh_token_dal = RefreshTokenDAL(session)
+            now = datetime.datetime.now(datetime.timezone.utc)
+            used_token = await refresh_token_dal.use_refresh_token(jti, now)
+            if used_token is None:
+                family_id = await refresh_token_dal.get_family_of_used_token(jti)
+                if family_id is not None:
+                    await refresh_token_dal.delete_family(family_id)
+                    logger.warning(
+                        f"Refresh reuse detected, family {family_id} revoked"
+                    )
+                return None
+            user_id, family_id = used_token
+            user = await get_user_claims(user_id, session)
+            if user is None or revocation_list.is_revoked(payload, user.user_id):
+                return None
+            auth_service = cls(user, session)
+            return auth_service, await auth_service._store_refresh_token(family_id)
 
     @staticmethod
-    async def get_user_by_refresh_token(
-        refresh_token: str, 
-        session: AsyncSession
-    ) -> User | None:
+    async def revoke_refresh_token(refresh_token: str, session: AsyncSession) -> None:
         payload = await JWT.decode_jwt_token(refresh_token, "refresh")
-        email: str = payload.get("sub")
-        return await get_user_by_email_action(email, session)
\ No newline at end of file
+        async with transaction(session):
+            await RefreshTokenDAL(session).delete_family_of(payload.get("jti"))
+
+    @staticmethod
+    async def revoke_access_token(payload: dict, session: AsyncSession) -> None:
+        if "jti" not in payload:
+            return
+        expires_at = datetime.datetime.fromtimestamp(
+            payload["exp"], tz=datetime.timezone.utc
+        )
+        async with transaction(session):
+            revocation = await RevocationDAL(session).revoke_token(
+                payload["jti"], expires_at
+            )
+        revocation_list.add(revocation)
+
+    @staticmethod
+    async def introspect_tokens(
+        tokens: list[str], session: AsyncSession
+    ) -> list[IntrospectionResult]:
+        """Verify access tokens for services that cannot check them locally"""
+        await revocation_list.refresh(session)
+        results = []
+        for token in tokens:
+            try:
+                payload = await JWT.decode_jwt_token(token, "access")
+            except HTTPException:
+                results.append(IntrospectionResult(active=False))
+                continue
+            if revocation_list.is_revoked(payload):
+                results.append(IntrospectionResult(active=False))
+            else:
+                results.append(IntrospectionResult(active=True, claims=payload))
+        return results
@@ -0,0 +1,74 @@
+import datetime
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import get_settings
+from api.core.exceptions import AppExceptions
+from db.dals import ServiceClientDAL
+from db.models import ServiceClient
+from db.session import transaction
+from utils.cache import ExpiringLRUCache
+from utils.hashing import Hasher
+from utils.jwt import JWT
+
+settings = get_settings()
+
+# Issued service tokens keyed by (client_id, scope), reused while they are
+# younger than half their lifetime so restarting pods do not mint new ones.
+service_token_cache = ExpiringLRUCache(
+    name="service_token", max_entries=settings.SERVICE_TOKEN_CACHE_MAX_ENTRIES
+)
+
+
+class ServiceClientService:
+
+    def __init__(self, client: ServiceClient):
+        self.client = client
+
+    @classmethod
+    async def create(cls, client_id: str, client_secret: str, session: AsyncSession):
+        async with transaction(session):
+            client = await ServiceClientDAL(session).get_service_client(client_id)
+        if (
+            client is None
+            or not client.is_active
+            or not Hasher.verify_client_secret(client_secret, client.secret_digest)
+        ):
+            AppExceptions.unauthorized_exception("Invalid client credentials")
+        return cls(client)
+
+    def grant_scopes(self, scope: str | None) -> list[str]:
+        requested = set(scope.split()) if scope else set(self.client.scopes)
+        if not requested <= set(self.client.scopes):
+            AppExceptions.bad_request_exception(
+                "Requested scope is not allowed for this client."
+            )
+        return sorted(requested)
+
+    async def create_service_token(self, scopes: list[str]) -> tuple[str, int]:
+        """Signed service token and its remaining lifetime in seconds"""
+        scope = " ".join(scopes)
+        cache_key = (self.client.client_id, scope)
+        cached = service_token_cache.get(cache_key)
+        if cached is not None:
+            token, expires_at = cached
+            return token, int(expires_at - time.time())
+
+        lifetime = datetime.timedelta(minutes=settings.SERVICE_TOKEN_EXPIRE_MINUTES)
+        expires_at = time.time() + lifetime.total_seconds()
+        token = await JWT.create_jwt_token(
+            data={
+                "sub": f"client:{self.client.client_id}",
+                "client_id": self.client.client_id,
+                "scope": scope,
+            },
+            token_type="access",
+            expires_delta=lifetime,
+        )
+        service_token_cache.set(
+            cache_key,
+            (token, expires_at),
+            expires_at=expires_at - lifetime.total_seconds() / 2,
+        )
+        return token, int(lifetime.total_seconds())
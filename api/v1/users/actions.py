@@ -1,43 +1,114 @@
+import datetime
+import time
+from functools import partial
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
+from api.v1.auth.schemas import TokenPrincipal
+from api.v1.users.schemas import MAX_BORROWED_BOOKS
 from api.v1.users.schemas import UpdateUserRequest
 from api.v1.users.schemas import UserCreate
+from db.dals import AdminChange
+from db.dals import RevocationDAL
+from db.dals import MutationOutcome
 from db.dals import UserDAL
+from db.dals import UserMutationResult
+from db.loaders import UserLoader
 from db.models import User
+from db.session import after_commit
+from db.session import async_session
+from db.session import track_writer
+from db.session import transaction
+from utils.cache import ExpiringLRUCache
 from utils.hashing import Hasher
+from utils.revocation import revocation_list
 from utils.roles import PortalRole
+from utils.user_versions import user_versions
+from utils.write_behind import WriteBehindBuffer
+
+settings = get_settings()
+
+# Claims snapshots for token refreshes keyed by user_id. User writes below drop
+# the local entry; other workers pick changes up within the cache TTL.
+user_claims_cache = ExpiringLRUCache(
+    name="user_claims", max_entries=settings.USER_CLAIMS_CACHE_MAX_ENTRIES
+)
+
+
+async def _apply_user_changes(session: AsyncSession, changes: dict) -> int:
+    updated_user_ids = await UserDAL(session).apply_admin_changes(changes)
+    for user_id in updated_user_ids:
+        user_claims_cache.delete(user_id)
+    return len(updated_user_ids)
+
+
+# Admin rating changes in write-behind mode; rejected changes (missing or
+# protected users) are dropped when the batch is applied.
+user_changes_buffer = WriteBehindBuffer(
+    name="user_changes",
+    session_factory=async_session,
+    apply=_apply_user_changes,
+    max_entries=settings.USER_WRITE_BEHIND_MAX_ENTRIES,
+    max_pending=settings.USER_WRITE_BEHIND_MAX_PENDING,
+    flush_interval=settings.USER_WRITE_BEHIND_INTERVAL_SECONDS,
+)
+
+
+def _forget_user(user_id: UUID, session: AsyncSession) -> None:
+    """Drop what this worker and the request remember of a user after a write"""
+    user_claims_cache.delete(user_id)
+    if (user_loader := session.info.get("user_loader")) is not None:
+        user_loader.clear()
 
 
 async def create_new_user_action(body: UserCreate, session: AsyncSession) -> User:
-    if await get_user_by_email_action(body.email, session) is not None:
-        AppExceptions.conflict_exception(
-            f"User with this email {body.email} already exists."
-        )
-    async with session.begin():
-        return await UserDAL(session).create_user(
+    track_writer(session, body.email)
+    hashed_password = await Hasher.get_password_hash_async(body.password)
+    async with transaction(session):
+        new_user = await UserDAL(session).create_user(
             name=body.name,
             surname=body.surname,
             email=body.email,
-            hashed_password=Hasher.get_password_hash(body.password),
+            hashed_password=hashed_password,
             roles=[PortalRole.ROLE_PORTAL_USER],
         )
+    if new_user is None:
+        AppExceptions.conflict_exception(
+            f"User with this email {body.email} already exists."
+        )
+    _forget_user(new_user.user_id, session)
+    return new_user
 
 
 async def delete_user_action(user_id: UUID, session: AsyncSession) -> UUID | None:
-    async with session.begin():
-        return await UserDAL(session).delete_user(
+    async with transaction(session):
+        deleted_user_id = await UserDAL(session).delete_user(
             user_id=user_id,
         )
+        if deleted_user_id is not None:
+            # Outlive every token issued so far, refresh tokens included.
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + (
+                datetime.timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+            )
+            revocation = await RevocationDAL(session).revoke_user(
+                deleted_user_id, expires_at
+            )
+            after_commit(session, partial(revocation_list.add, revocation))
+    _forget_user(user_id, session)
+    return deleted_user_id
 
 
 async def activate_user_action(user_id: UUID, session: AsyncSession) -> UUID | None:
-    async with session.begin():
-        return await UserDAL(session).activate_user(
+    async with transaction(session):
+        activated_user_id = await UserDAL(session).activate_user(
             user_id=user_id,
         )
+    _forget_user(user_id, session)
+    return activated_user_id
 
 
 async def process_user_update_request_action(
@@ -47,7 +118,7 @@ async def process_user_update_request_action(
     user = await get_user_by_id_action(user_id, session)
 
     old_password = updated_params.pop("old_password", None)
-    if not old_password or not Hasher.verify_password(
+    if not old_password or not await Hasher.verify_password_async(
         old_password, user.hashed_password
     ):
         AppExceptions.unauthorized_exception("Incorrect password")
@@ -58,7 +129,9 @@ async def process_user_update_request_action(
         )
 
     if new_password := updated_params.pop("new_password", None):
-        updated_params["hashed_password"] = Hasher.get_password_hash(new_password)
+        updated_params["hashed_password"] = await Hasher.get_password_hash_async(
+            new_password
+        )
 
     return await update_user_action(user_id, updated_params, session)
 
@@ -66,19 +139,40 @@ async def process_user_update_request_action(
 async def update_user_action(
     user_id: UUID, updated_user_params: dict, session: AsyncSession
 ) -> UUID | None:
-    async with session.begin():
-        return await UserDAL(session).update_user(
+    async with transaction(session):
+        updated_user = await UserDAL(session).update_user(
             user_id=user_id, **updated_user_params
         )
+    _forget_user(user_id, session)
+    if updated_user is not None:
+        return updated_user[0]
+
+
+async def rehash_password_action(
+    user: User, hashed_password: str, session: AsyncSession
+) -> None:
+    """Store a rehashed password and bring the loaded user up to date"""
+    async with transaction(session):
+        updated_user = await UserDAL(session).update_user(
+            user_id=user.user_id, hashed_password=hashed_password
+        )
+    _forget_user(user.user_id, session)
+    if updated_user is not None:
+        set_committed_value(user, "hashed_password", hashed_password)
+        set_committed_value(user, "version", updated_user[1])
 
 
 async def get_user_by_id_action(user_id: UUID, session: AsyncSession) -> User | None:
-    async with session.begin():
+    if session.info.get("unit_of_work"):
+        return await UserLoader.for_session(session).load(user_id)
+    async with transaction(session):
         return await UserDAL(session).get_user_by_id(user_id)
 
 
 async def get_user_by_email_action(email: str, session: AsyncSession) -> User | None:
-    async with session.begin():
+    if session.info.get("unit_of_work"):
+        return await UserLoader.for_session(session).load_by_email(email)
+    async with transaction(session):
         return await UserDAL(session).get_user_by_email(email=email)
 
 
@@ -94,7 +188,7 @@ async def fetch_user_or_raise(
 
 
 async def check_user_permissions(target_user: User, current_user: User) -> bool:
-    if target_user == current_user:
+    if target_user.user_id == current_user.user_id:
         return True
     if target_user.is_superadmin:
         return False
@@ -105,20 +199,35 @@ async def check_user_permissions(target_user: User, current_user: User) -> bool:
     return False
 
 
+def _updated_user_id_or_raise(
+    result: UserMutationResult,
+    user_id: UUID,
+    forbidden_detail: str = "Forbidden.",
+    conflict_detail: str = "User was changed by another request, please retry.",
+) -> UUID:
+    if result.outcome == MutationOutcome.NOT_FOUND:
+        AppExceptions.not_found_exception(f"User with id {user_id} not found.")
+    if result.outcome == MutationOutcome.FORBIDDEN:
+        AppExceptions.forbidden_exception(forbidden_detail)
+    if result.outcome == MutationOutcome.CONFLICT:
+        AppExceptions.conflict_exception(conflict_detail)
+    return result.user_id
+
+
 async def grant_admin_privilege_action(
     user_id: UUID, current_user: User, session: AsyncSession
 ) -> UUID | None:
     if current_user.user_id == user_id:
         AppExceptions.bad_request_exception("Cannot manage privileges of itself.")
-    user_for_promotion = await fetch_user_or_raise(user_id, current_user, session)
-    if user_for_promotion.is_admin or user_for_promotion.is_superadmin:
-        AppExceptions.conflict_exception(
-            f"User with email {user_for_promotion.email} already promoted to admin / superadmin"
+    async with transaction(session):
+        result = await UserDAL(session).grant_admin_role(
+            user_id, actor_id=current_user.user_id
         )
-    return await update_user_action(
-        user_id=user_id,
-        updated_user_params={"roles": user_for_promotion.extend_roles_with_admin()},
-        session=session,
+    _forget_user(user_id, session)
+    return _updated_user_id_or_raise(
+        result,
+        user_id,
+        conflict_detail=f"User with email {result.email} already promoted to admin / superadmin",
     )
 
 
@@ -127,18 +236,32 @@ async def revoke_admin_privilege_action(
 ) -> UUID | None:
     if current_user.user_id == user_id:
         AppExceptions.bad_request_exception("Cannot manage privileges of itself.")
-    user_for_promotion = await fetch_user_or_raise(user_id, current_user, session)
-    if not user_for_promotion.is_admin:
-        AppExceptions.conflict_exception(
-            f"User with email {user_for_promotion.email} has no admin privileges"
+    async with transaction(session):
+        result = await UserDAL(session).revoke_admin_role(
+            user_id, actor_id=current_user.user_id
         )
-    return await update_user_action(
-        user_id=user_id,
-        updated_user_params={"roles": user_for_promotion.exclude_admin_role()},
-        session=session,
+    _forget_user(user_id, session)
+    return _updated_user_id_or_raise(
+        result,
+        user_id,
+        conflict_detail=f"User with email {result.email} has no admin privileges",
     )
 
 
+def _buffer_admin_change(user_id: UUID, current_user: User, **changes) -> None:
+    """Queue the change; permissions are checked when the batch is applied.
+
+    Each field keeps the admin who set it, so merging with a later change by
+    another admin does not apply it with that admin's rights.
+    """
+    user_changes_buffer.put(
+        user_id,
+        {
+            field: AdminChange(value, current_user.user_id, current_user.is_superadmin)
+            for field, value in changes.items()
+        },
+    )
+
 
 async def change_rating_of_user_by_id(
         user_id: UUID, 
@@ -153,19 +276,23 @@ async def change_rating_of_user_by_id(
     if current_user.user_id == user_id:
         AppExceptions.bad_request_exception("Cannot change rating of itself.")
 
-    user_for_promotion = await fetch_user_or_raise(user_id, current_user, session)
+    if settings.USER_WRITE_BEHIND:
+        _buffer_admin_change(user_id, current_user, rating=rating)
+        return user_id
 
-    if user_for_promotion.is_superadmin or \
-            (user_for_promotion.is_admin and not current_user.is_superadmin):
-        AppExceptions.forbidden_exception(
-            f"Rating of user with email {user_for_promotion.email} cannot be changed by you."
-        )
-
-    async with session.begin():
-        return await UserDAL(session).update_user(
-            user_id=user_id,
+    async with transaction(session):
+        result = await UserDAL(session).update_user_as_admin(
+            user_id,
+            actor_id=current_user.user_id,
+            actor_is_superadmin=current_user.is_superadmin,
             rating=rating,
         )
+    _forget_user(user_id, session)
+    return _updated_user_id_or_raise(
+        result,
+        user_id,
+        forbidden_detail=f"Rating of user with email {result.email} cannot be changed by you.",
+    )
     
 
 async def change_count_of_borrowed_books_of_user_by_id(
@@ -181,16 +308,95 @@ async def change_count_of_borrowed_books_of_user_by_id(
     if current_user.user_id == user_id:
         AppExceptions.bad_request_exception("Cannot change count of borrowed books of itself.")
 
-    user_for_promotion = await fetch_user_or_raise(user_id, current_user, session)
+    async with transaction(session):
+        result = await UserDAL(session).update_user_as_admin(
+            user_id,
+            actor_id=current_user.user_id,
+            actor_is_superadmin=current_user.is_superadmin,
+            count_of_borrowed_books=count_of_borrowed,
+        )
+    _forget_user(user_id, session)
+    return _updated_user_id_or_raise(
+        result,
+        user_id,
+        forbidden_detail=f"Count of borrowed books of user with email {result.email} cannot be changed by you.",
+    )
+
+
+async def change_borrowed_books_action(
+    user_id: UUID, delta: int, current_user: User, session: AsyncSession
+) -> UUID:
+    """Borrow (delta 1) or return (delta -1) a book in one conditional UPDATE"""
+    if not current_user.is_admin and not current_user.is_superadmin:
+        AppExceptions.forbidden_exception()
 
-    if user_for_promotion.is_superadmin or \
-            (user_for_promotion.is_admin and not current_user.is_superadmin):
-        AppExceptions.forbidden_exception(
-            f"Count of borrowed books of user with email {user_for_promotion.email} cannot be changed by you."
+    if current_user.user_id == user_id:
+        AppExceptions.bad_request_exception(
+            "Cannot change count of borrowed books of itself."
         )
 
-    async with session.begin():
-        return await UserDAL(session).update_user(
-            user_id=user_id,
-            count_of_borrowed_books=count_of_borrowed,
-        )
\ No newline at end of file
+    async with transaction(session):
+        result = await UserDAL(session).change_borrowed_books_as_admin(
+            user_id,
+            delta=delta,
+            limit=MAX_BORROWED_BOOKS,
+            actor_id=current_user.user_id,
+            actor_is_superadmin=current_user.is_superadmin,
+        )
+    _forget_user(user_id, session)
+    if delta > 0:
+        conflict_detail = f"User with email {result.email} already borrowed {MAX_BORROWED_BOOKS} books."
+    else:
+        conflict_detail = f"User with email {result.email} has no borrowed books."
+    return _updated_user_id_or_raise(
+        result,
+        user_id,
+        forbidden_detail=f"Count of borrowed books of user with email {result.email} cannot be changed by you.",
+        conflict_detail=conflict_detail,
+    )
+
+
+async def change_borrowed_books_of_users_action(
+    user_ids: list[UUID], delta: int, current_user: User, session: AsyncSession
+) -> tuple[list[UUID], list[UUID]]:
+    """Batch of change_borrowed_books_action; returns (changed, rejected) ids"""
+    if not current_user.is_admin and not current_user.is_superadmin:
+        AppExceptions.forbidden_exception()
+
+    user_dal = UserDAL(session)
+    async with transaction(session):
+        changed_user_ids = await user_dal.change_borrowed_books_of_users_as_admin(
+            user_ids,
+            delta=delta,
+            limit=MAX_BORROWED_BOOKS,
+            actor_id=current_user.user_id,
+            actor_is_superadmin=current_user.is_superadmin,
+        )
+    for user_id in changed_user_ids:
+        _forget_user(user_id, session)
+    changed = set(changed_user_ids)
+    rejected_user_ids = [
+        user_id for user_id in dict.fromkeys(user_ids) if user_id not in changed
+    ]
+    return changed_user_ids, rejected_user_ids
+
+
+async def get_user_claims(
+    user_id: UUID, session: AsyncSession
+) -> TokenPrincipal | None:
+    """Claims snapshot of a user, read from the database only on a cache miss.
+
+    Runs inside the caller's transaction.
+    """
+    principal = user_claims_cache.get(user_id)
+    if principal is None or user_versions.is_stale(user_id, principal.version):
+        user = await UserDAL(session).get_user_by_id(user_id)
+        if user is None:
+            return None
+        principal = TokenPrincipal.from_user(user)
+        user_claims_cache.set(
+            user_id,
+            principal,
+            expires_at=time.time() + settings.USER_CLAIMS_CACHE_TTL_SECONDS,
+        )
+    return principal
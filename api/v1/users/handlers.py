@@ -2,13 +2,17 @@ from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Response
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.core.config import get_settings
 from api.core.dependencies import get_current_user_from_access_token as get_current_user
-from api.core.dependencies import get_session
+from api.core.dependencies import get_unit_of_work
 from api.core.exceptions import AppExceptions
 from api.v1.users.actions import activate_user_action, change_count_of_borrowed_books_of_user_by_id, change_rating_of_user_by_id
+from api.v1.users.actions import change_borrowed_books_action
+from api.v1.users.actions import change_borrowed_books_of_users_action
 from api.v1.users.actions import check_user_permissions
 from api.v1.users.actions import create_new_user_action
 from api.v1.users.actions import delete_user_action
@@ -17,6 +21,8 @@ from api.v1.users.actions import grant_admin_privilege_action
 from api.v1.users.actions import process_user_update_request_action
 from api.v1.users.actions import revoke_admin_privilege_action
 from api.v1.users.schemas import ActivateUserResponse, UserCountOfBorrowedBooks, UserRating
+from api.v1.users.schemas import BorrowedBooksBatchRequest
+from api.v1.users.schemas import BorrowedBooksBatchResponse
 from api.v1.users.schemas import DeleteUserResponse
 from api.v1.users.schemas import ShowUser
 from api.v1.users.schemas import UpdatedUserResponse
@@ -27,10 +33,12 @@ from utils.decorators import only_superadmin
 
 user_router = APIRouter()
 
+settings = get_settings()
+
 
 @user_router.post("/", response_model=ShowUser)
 async def create_user(
-    body: UserCreate, session: AsyncSession = Depends(get_session)
+    body: UserCreate, session: AsyncSession = Depends(get_unit_of_work)
 ) -> ShowUser:
     try:
         user = await create_new_user_action(body, session)
@@ -50,10 +58,10 @@ async def create_user(
 async def delete_user(
     user_id: UUID,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
 ) -> DeleteUserResponse:
     target_user = await fetch_user_or_raise(user_id, current_user, session)
-    if target_user == current_user and current_user.is_superadmin:
+    if target_user.user_id == current_user.user_id and current_user.is_superadmin:
         AppExceptions.not_acceptable_exception("Superadmin cannot be deleted via API.")
 
     if not await check_user_permissions(
@@ -71,7 +79,7 @@ async def delete_user(
 async def activate_user(
     user_id: UUID,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
 ) -> ActivateUserResponse:
     target_user = await fetch_user_or_raise(user_id, current_user, session)
     if not await check_user_permissions(
@@ -87,7 +95,7 @@ async def activate_user(
 async def get_user_by_id(
     user_id: UUID,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
 ) -> ShowUser:
     target_user = await fetch_user_or_raise(user_id, current_user, session)
     if not await check_user_permissions(
@@ -116,7 +124,7 @@ async def update_user_by_id(
     user_id: UUID,
     body: UpdateUserRequest,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
 ) -> UpdatedUserResponse:
     target_user = await fetch_user_or_raise(user_id, current_user, session)
     if not await check_user_permissions(
@@ -137,7 +145,7 @@ async def update_user_by_id(
 @only_superadmin
 async def grant_admin_privilege(
     user_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
     current_user: User = Depends(get_current_user),
 ):
     try:
@@ -155,7 +163,7 @@ async def grant_admin_privilege(
 @only_superadmin
 async def revoke_admin_privilege(
     user_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
     current_user: User = Depends(get_current_user),
 ):
     try:
@@ -177,7 +185,8 @@ async def revoke_admin_privilege(
 async def change_user_rating(
     user_id: UUID,
     rating: UserRating,
-    session: AsyncSession = Depends(get_session),
+    response: Response,
+    session: AsyncSession = Depends(get_unit_of_work),
     current_user: User = Depends(get_current_user),
 ):
     rating = rating.rating
@@ -190,6 +199,8 @@ async def change_user_rating(
         )
     except IntegrityError:
         AppExceptions.service_unavailable_exception("Database error.")
+    if settings.USER_WRITE_BEHIND:
+        response.status_code = 202
     return user_id_with_changed_rating
 
 
@@ -198,7 +209,7 @@ async def change_user_rating(
 async def change_user_count_of_borrowed_books(
     user_id: UUID,
     count_of_borrowed: UserCountOfBorrowedBooks,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_unit_of_work),
     current_user: User = Depends(get_current_user),
 ):
     count_of_borrowed = count_of_borrowed.count_of_borrowed_books
@@ -211,4 +222,50 @@ async def change_user_count_of_borrowed_books(
         )
     except IntegrityError:
         AppExceptions.service_unavailable_exception("Database error.")
-    return user_id_with_changed_count_of_borrowed
\ No newline at end of file
+    return user_id_with_changed_count_of_borrowed
+
+
+@user_router.post("/borrow_book")
+async def borrow_book(
+    user_id: UUID,
+    session: AsyncSession = Depends(get_unit_of_work),
+    current_user: User = Depends(get_current_user),
+) -> UUID:
+    return await change_borrowed_books_action(user_id, 1, current_user, session)
+
+
+@user_router.post("/return_book")
+async def return_book(
+    user_id: UUID,
+    session: AsyncSession = Depends(get_unit_of_work),
+    current_user: User = Depends(get_current_user),
+) -> UUID:
+    return await change_borrowed_books_action(user_id, -1, current_user, session)
+
+
+@user_router.post("/borrow_books", response_model=BorrowedBooksBatchResponse)
+async def borrow_books(
+    body: BorrowedBooksBatchRequest,
+    session: AsyncSession = Depends(get_unit_of_work),
+    current_user: User = Depends(get_current_user),
+) -> BorrowedBooksBatchResponse:
+    changed, rejected = await change_borrowed_books_of_users_action(
+        body.user_ids, 1, current_user, session
+    )
+    return BorrowedBooksBatchResponse(
+        changed_user_ids=changed, rejected_user_ids=rejected
+    )
+
+
+@user_router.post("/return_books", response_model=BorrowedBooksBatchResponse)
+async def return_books(
+    body: BorrowedBooksBatchRequest,
+    session: AsyncSession = Depends(get_unit_of_work),
+    current_user: User = Depends(get_current_user),
+) -> BorrowedBooksBatchResponse:
+    changed, rejected = await change_borrowed_books_of_users_action(
+        body.user_ids, -1, current_user, session
+    )
+    return BorrowedBooksBatchResponse(
+        changed_user_ids=changed, rejected_user_ids=rejected
+    )
@@ -4,10 +4,16 @@ from typing import Optional
 
 from pydantic import BaseModel
 from pydantic import EmailStr
+from pydantic import Field
 from pydantic import field_validator
 
+from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
 
+settings = get_settings()
+
+MAX_BORROWED_BOOKS = 10
+
 
 LETTER_MATCH_PATTERN = re.compile(r"^[а-яА-Яa-zA-Z\-]+$")
 PASSWORD_REGEX = re.compile(
@@ -115,6 +121,17 @@ class UserCountOfBorrowedBooks(BaseModel):
 
     @field_validator("count_of_borrowed_books")
     def validate_count_of_borrowed_books(cls, value):
-        if value < 0 or value > 10:
-            AppExceptions.bad_request_exception("Count of borrowed books can be from 0 to 10.")
-        return value
\ No newline at end of file
+        if value < 0 or value > MAX_BORROWED_BOOKS:
+            AppExceptions.bad_request_exception(f"Count of borrowed books can be from 0 to {MAX_BORROWED_BOOKS}.")
+        return value
+
+
+class BorrowedBooksBatchRequest(BaseModel):
+    user_ids: list[uuid.UUID] = Field(
+        min_length=1, max_length=settings.BORROWED_BOOKS_BATCH_MAX_USERS
+    )
+
+
+class BorrowedBooksBatchResponse(BaseModel):
+    changed_user_ids: list[uuid.UUID]
+    rejected_user_ids: list[uuid.UUID]
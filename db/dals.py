@@ -1,13 +1,88 @@
+import datetime
+from enum import StrEnum
+from typing import NamedTuple
 from uuid import UUID
 
+from sqlalchemy import ARRAY
+from sqlalchemy import Boolean
+from sqlalchemy import Integer
 from sqlalchemy import and_
+from sqlalchemy import any_
+from sqlalchemy import bindparam
+from sqlalchemy import case
+from sqlalchemy import cast
+from sqlalchemy import column
+from sqlalchemy import delete
+from sqlalchemy import false
+from sqlalchemy import func
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import true
 from sqlalchemy import update
+from sqlalchemy import values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db.models import RefreshToken
+from db.models import RevokedToken
+from db.models import ServiceClient
 from db.models import User
+from db.models import user_version_seq
+from db.session import read_first
 from utils.roles import PortalRole
 
+ADMIN = PortalRole.ROLE_PORTAL_ADMIN
+SUPERADMIN = PortalRole.ROLE_PORTAL_SUPERADMIN
+
+
+def next_user_version():
+    return user_version_seq.next_value()
+
+
+class MutationOutcome(StrEnum):
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    CONFLICT = "conflict"
+
+
+class UserMutationResult(NamedTuple):
+    outcome: MutationOutcome
+    # Email of the target user if it exists, for error messages.
+    email: str | None = None
+    user_id: UUID | None = None
+
+
+class AdminChange(NamedTuple):
+    """New value of one field and the admin who set it"""
+
+    value: int
+    actor_id: UUID
+    actor_is_superadmin: bool
+
+
+# Only absolute values that nothing else updates relatively may be buffered;
+# count_of_borrowed_books is also changed by borrow and return, which a
+# buffered count would overwrite at flush.
+ADMIN_CHANGE_FIELDS = ("rating",)
+
+
+def _has_role(role: PortalRole):
+    return User.roles.any(role)
+
+
+def _admin_may_change(actor_id, actor_is_superadmin):
+    """Superadmins are never targets, admins only of superadmins, nobody itself.
+
+    The actor arguments are values or columns, e.g. of a VALUES list.
+    """
+    return and_(
+        User.user_id != actor_id,
+        ~_has_role(SUPERADMIN),
+        or_(actor_is_superadmin, ~_has_role(ADMIN)),
+    )
+
 
 class UserDAL:
     def __init__(self, db_session: AsyncSession):
@@ -20,23 +95,28 @@ class UserDAL:
         email: str,
         hashed_password: str,
         roles: list[PortalRole],
-    ) -> User:
-        new_user = User(
-            name=name,
-            surname=surname,
-            email=email,
-            hashed_password=hashed_password,
-            roles=roles,
+    ) -> User | None:
+        """Insert a user; returns None if the email is already taken"""
+        query = (
+            insert(User)
+            .values(
+                name=name,
+                surname=surname,
+                email=email,
+                hashed_password=hashed_password,
+                roles=roles,
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
         )
-        self.db_session.add(new_user)
-        await self.db_session.commit()
-        return new_user
+        res = await self.db_session.execute(query)
+        return res.scalar_one_or_none()
 
     async def delete_user(self, user_id: UUID) -> UUID | None:
         query = (
             update(User)
             .where(and_(User.user_id == user_id, User.is_active == True))
-            .values(is_active=False)
+            .values(is_active=False, version=next_user_version())
             .returning(User.user_id)
         )
         res = await self.db_session.execute(query)
@@ -48,7 +128,7 @@ class UserDAL:
         query = (
             update(User)
             .where(and_(User.user_id == user_id, User.is_active == False))
-            .values(is_active=True)
+            .values(is_active=True, version=next_user_version())
             .returning(User.user_id)
         )
         res = await self.db_session.execute(query)
@@ -58,26 +138,364 @@ class UserDAL:
 
     async def get_user_by_id(self, user_id: UUID) -> User | None:
         query = select(User).where(User.user_id == user_id)
-        res = await self.db_session.execute(query)
-        user_row = res.fetchone()
-        if user_row is not None:
-            return user_row[0]
+        return await read_first(self.db_session, query)
 
     async def get_user_by_email(self, email: str) -> User | None:
         query = select(User).where(User.email == email)
+        return await read_first(self.db_session, query)
+
+    async def get_users_by_ids(self, user_ids: list[UUID]) -> list[User]:
+        user_ids_param = bindparam(
+            "user_ids", user_ids, type_=ARRAY(PG_UUID(as_uuid=True))
+        )
+        query = select(User).where(User.user_id == any_(user_ids_param))
         res = await self.db_session.execute(query)
-        user_row = res.fetchone()
-        if user_row is not None:
-            return user_row[0]
+        return list(res.scalars())
+
+    async def get_max_user_version(self) -> int:
+        res = await self.db_session.execute(select(func.max(User.version)))
+        return res.scalar() or 0
 
-    async def update_user(self, user_id: UUID, **kwargs) -> UUID | None:
+    async def get_user_versions_after(self, version: int) -> list[tuple[UUID, int]]:
+        query = (
+            select(User.user_id, User.version)
+            .where(User.version > version)
+            .order_by(User.version)
+        )
+        res = await self.db_session.execute(query)
+        return [(user_id, user_version) for user_id, user_version in res.all()]
+
+    async def update_user_as_admin(
+        self, user_id: UUID, actor_id: UUID, actor_is_superadmin: bool, **kwargs
+    ) -> UserMutationResult:
+        return await self._update_if_permitted(
+            user_id, _admin_may_change(actor_id, actor_is_superadmin), false(), kwargs
+        )
+
+    async def change_borrowed_books_as_admin(
+        self,
+        user_id: UUID,
+        delta: int,
+        limit: int,
+        actor_id: UUID,
+        actor_is_superadmin: bool,
+    ) -> UserMutationResult:
+        """Add delta to the borrowed books count unless it leaves 0..limit"""
+        new_count = func.coalesce(User.count_of_borrowed_books, 0) + delta
+        return await self._update_if_permitted(
+            user_id,
+            permitted=_admin_may_change(actor_id, actor_is_superadmin),
+            conflict=(new_count < 0) | (new_count > limit),
+            values={"count_of_borrowed_books": new_count},
+        )
+
+    async def change_borrowed_books_of_users_as_admin(
+        self,
+        user_ids: list[UUID],
+        delta: int,
+        limit: int,
+        actor_id: UUID,
+        actor_is_superadmin: bool,
+    ) -> list[UUID]:
+        """Batch form of change_borrowed_books_as_admin in one UPDATE; returns
+        the ids of the changed users"""
+        new_count = func.coalesce(User.count_of_borrowed_books, 0) + delta
+        user_ids_param = bindparam(
+            "user_ids", list(set(user_ids)), type_=ARRAY(PG_UUID(as_uuid=True))
+        )
+        # Lock the rows in user_id order first, so that concurrent batches
+        # over overlapping users cannot deadlock.
+        locked = (
+            select(User.user_id)
+            .where(User.user_id == any_(user_ids_param))
+            .order_by(User.user_id)
+            .with_for_update()
+            .cte("locked")
+        )
         query = (
             update(User)
-            .where(and_(User.user_id == user_id, User.is_active == True))
-            .values(kwargs)
+            .where(
+                User.user_id == locked.c.user_id,
+                User.is_active == True,
+                _admin_may_change(actor_id, actor_is_superadmin),
+                new_count.between(0, limit),
+            )
+            .values(count_of_borrowed_books=new_count, version=next_user_version())
+            .returning(User.user_id)
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
+
+    async def grant_admin_role(
+        self, user_id: UUID, actor_id: UUID
+    ) -> UserMutationResult:
+        return await self._update_if_permitted(
+            user_id,
+            permitted=User.user_id != actor_id,
+            conflict=_has_role(ADMIN) | _has_role(SUPERADMIN),
+            values={"roles": func.array_append(User.roles, ADMIN)},
+        )
+
+    async def revoke_admin_role(
+        self, user_id: UUID, actor_id: UUID
+    ) -> UserMutationResult:
+        return await self._update_if_permitted(
+            user_id,
+            permitted=and_(User.user_id != actor_id, ~_has_role(SUPERADMIN)),
+            conflict=~_has_role(ADMIN),
+            values={"roles": func.array_remove(User.roles, ADMIN)},
+        )
+
+    async def apply_admin_changes(
+        self, changes: dict[UUID, dict[str, AdminChange]]
+    ) -> list[UUID]:
+        """Apply buffered admin changes of many users in one UPDATE ... FROM (VALUES ...).
+
+        Each user's change maps the fields in ADMIN_CHANGE_FIELDS to an
+        AdminChange. The permission rules are checked per field against the
+        admin who set it; fields that admin may not change are left as they
+        are. Returns the ids of the users with at least one field updated.
+        """
+        change_columns = [column("user_id", PG_UUID(as_uuid=True))]
+        for field in ADMIN_CHANGE_FIELDS:
+            change_columns += [
+                column(field, Integer),
+                column(f"{field}_actor_id", PG_UUID(as_uuid=True)),
+                column(f"{field}_actor_is_superadmin", Boolean),
+            ]
+        change_rows = values(*change_columns, name="changes").data(
+            [
+                (
+                    user_id,
+                    *(
+                        item
+                        for field in ADMIN_CHANGE_FIELDS
+                        for item in change.get(field, (None, None, None))
+                    ),
+                )
+                for user_id, change in sorted(changes.items())
+            ]
+        )
+        # A VALUES column holding only NULLs is typed text, hence the casts.
+        permitted = {
+            field: and_(
+                change_rows.c[field].is_not(None),
+                _admin_may_change(
+                    cast(change_rows.c[f"{field}_actor_id"], PG_UUID(as_uuid=True)),
+                    cast(change_rows.c[f"{field}_actor_is_superadmin"], Boolean),
+                ),
+            )
+            for field in ADMIN_CHANGE_FIELDS
+        }
+        query = (
+            update(User)
+            .where(
+                User.user_id == change_rows.c.user_id,
+                User.is_active == True,
+                or_(*permitted.values()),
+            )
+            .values(
+                {
+                    field: case(
+                        (permitted[field], cast(change_rows.c[field], Integer)),
+                        else_=getattr(User, field),
+                    )
+                    for field in ADMIN_CHANGE_FIELDS
+                }
+                | {"version": next_user_version()}
+            )
+            .returning(User.user_id)
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
+
+    async def _update_if_permitted(
+        self, user_id: UUID, permitted, conflict, values: dict
+    ) -> UserMutationResult:
+        """Update an active user in one statement if the predicates allow it.
+
+        The predicates are evaluated on the row the UPDATE locks. The target
+        row is selected alongside only to tell why nothing was updated.
+        """
+        active_user = and_(User.user_id == user_id, User.is_active == True)
+        updated = (
+            update(User)
+            .where(active_user, permitted, ~conflict)
+            .values({**values, "version": next_user_version()})
             .returning(User.user_id)
+            .cte("updated")
+        )
+        target = (
+            select(
+                User.email,
+                permitted.label("permitted"),
+                conflict.label("conflict"),
+            )
+            .where(active_user)
+            .cte("target")
+        )
+        query = (
+            select(target.c.email, target.c.permitted, updated.c.user_id)
+            .select_from(target.outerjoin(updated, true()))
+            .execution_options(modifies_rows=True)
+        )
+        res = await self.db_session.execute(query)
+        row = res.fetchone()
+        if row is None:
+            return UserMutationResult(MutationOutcome.NOT_FOUND)
+        email, is_permitted, updated_user_id = row
+        if updated_user_id is not None:
+            return UserMutationResult(MutationOutcome.UPDATED, email, updated_user_id)
+        if not is_permitted:
+            return UserMutationResult(MutationOutcome.FORBIDDEN, email)
+        return UserMutationResult(MutationOutcome.CONFLICT, email)
+
+    async def update_user(self, user_id: UUID, **kwargs) -> tuple[UUID, int] | None:
+        """Update an active user, returning its id and new version.
+
+        Loaded instances are left as they are rather than expired, since an
+        expired version cannot be lazy loaded under asyncio; callers holding
+        one bring it up to date from the returned version.
+        """
+        query = (
+            update(User)
+            .where(and_(User.user_id == user_id, User.is_active == True))
+            .values({**kwargs, "version": next_user_version()})
+            .returning(User.user_id, User.version)
+            .execution_options(synchronize_session=False)
         )
         res = await self.db_session.execute(query)
-        update_user_id_row = res.fetchone()
-        if update_user_id_row is not None:
-            return update_user_id_row[0]
+        update_user_row = res.fetchone()
+        if update_user_row is not None:
+            return update_user_row[0], update_user_row[1]
+
+
+class RevocationDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def revoke_token(
+        self, jti: str, expires_at: datetime.datetime
+    ) -> RevokedToken:
+        return await self._add(RevokedToken(jti=jti, expires_at=expires_at))
+
+    async def revoke_user(
+        self, user_id: UUID, expires_at: datetime.datetime
+    ) -> RevokedToken:
+        return await self._add(RevokedToken(user_id=user_id, expires_at=expires_at))
+
+    async def get_revocations_after(
+        self, revocation_id: int, now: datetime.datetime
+    ) -> list[RevokedToken]:
+        query = (
+            select(RevokedToken)
+            .where(
+                and_(
+                    RevokedToken.revocation_id > revocation_id,
+                    RevokedToken.expires_at > now,
+                )
+            )
+            .order_by(RevokedToken.revocation_id)
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
+
+    async def _add(self, revocation: RevokedToken) -> RevokedToken:
+        revocation.revoked_at = datetime.datetime.now(datetime.timezone.utc)
+        self.db_session.add(revocation)
+        await self.db_session.flush()
+        return revocation
+
+
+class RefreshTokenDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def create_refresh_token(
+        self,
+        jti: str,
+        family_id: UUID,
+        user_id: UUID,
+        expires_at: datetime.datetime,
+    ) -> RefreshToken:
+        refresh_token = RefreshToken(
+            jti=jti, family_id=family_id, user_id=user_id, expires_at=expires_at
+        )
+        self.db_session.add(refresh_token)
+        await self.db_session.flush()
+        return refresh_token
+
+    async def use_refresh_token(
+        self, jti: str, now: datetime.datetime
+    ) -> tuple[UUID, UUID] | None:
+        """Mark an unused, unexpired token as used; returns (user_id, family_id)"""
+        query = (
+            update(RefreshToken)
+            .where(
+                and_(
+                    RefreshToken.jti == jti,
+                    RefreshToken.used_at.is_(None),
+                    RefreshToken.expires_at > now,
+                )
+            )
+            .values(used_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        res = await self.db_session.execute(query)
+        used_token_row = res.fetchone()
+        if used_token_row is not None:
+            return used_token_row[0], used_token_row[1]
+
+    async def get_family_of_used_token(self, jti: str) -> UUID | None:
+        query = select(RefreshToken.family_id).where(
+            and_(RefreshToken.jti == jti, RefreshToken.used_at.is_not(None))
+        )
+        res = await self.db_session.execute(query)
+        return res.scalar_one_or_none()
+
+    async def delete_family(self, family_id: UUID) -> int:
+        query = delete(RefreshToken).where(RefreshToken.family_id == family_id)
+        res = await self.db_session.execute(query)
+        return res.rowcount
+
+    async def delete_family_of(self, jti: str) -> int:
+        family_id = (
+            select(RefreshToken.family_id)
+            .where(RefreshToken.jti == jti)
+            .scalar_subquery()
+        )
+        query = delete(RefreshToken).where(RefreshToken.family_id == family_id)
+        res = await self.db_session.execute(query)
+        return res.rowcount
+
+    async def delete_expired(self, now: datetime.datetime, batch_size: int) -> int:
+        expired_jtis = (
+            select(RefreshToken.jti)
+            .where(RefreshToken.expires_at <= now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        query = delete(RefreshToken).where(RefreshToken.jti.in_(expired_jtis))
+        res = await self.db_session.execute(query)
+        return res.rowcount
+
+
+class ServiceClientDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def create_service_client(
+        self, client_id: str, name: str, secret_digest: str, scopes: list[str]
+    ) -> ServiceClient:
+        service_client = ServiceClient(
+            client_id=client_id,
+            name=name,
+            secret_digest=secret_digest,
+            scopes=scopes,
+        )
+        self.db_session.add(service_client)
+        await self.db_session.flush()
+        return service_client
+
+    async def get_service_client(self, client_id: str) -> ServiceClient | None:
+        return await self.db_session.get(ServiceClient, client_id)
@@ -0,0 +1,87 @@
+import asyncio
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.dals import UserDAL
+from db.models import User
+
+
+class UserLoader:
+    """Identity map of the users a unit of work has loaded.
+
+    Users are memoized by id and email, so each one is selected once per
+    request. Lookups by id made in the same event loop iteration are sent as
+    one ``user_id = ANY(...)`` query. Writes to users must call ``clear``.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._by_id: dict[UUID, asyncio.Future] = {}
+        self._by_email: dict[str, User | None] = {}
+        self._queue: list[UUID] = []
+        self._lock = asyncio.Lock()
+        # The event loop keeps only weak references to tasks.
+        self._dispatches: set[asyncio.Task] = set()
+
+    @classmethod
+    def for_session(cls, session: AsyncSession) -> "UserLoader":
+        if "user_loader" not in session.info:
+            session.info["user_loader"] = cls(session)
+        return session.info["user_loader"]
+
+    async def load(self, user_id: UUID) -> User | None:
+        if user_id not in self._by_id:
+            self._by_id[user_id] = asyncio.get_running_loop().create_future()
+            self._queue.append(user_id)
+            if len(self._queue) == 1:
+                asyncio.get_running_loop().call_soon(self._schedule_dispatch)
+        return await asyncio.shield(self._by_id[user_id])
+
+    async def load_by_email(self, email: str) -> User | None:
+        if email not in self._by_email:
+            async with self._lock:
+                user = await UserDAL(self.session).get_user_by_email(email)
+            self._remember(email, user)
+        return self._by_email[email]
+
+    def clear(self) -> None:
+        self._by_id = {
+            user_id: future
+            for user_id, future in self._by_id.items()
+            if not future.done()
+        }
+        self._by_email.clear()
+
+    def _remember(self, email: str, user: User | None) -> None:
+        self._by_email[email] = user
+        if user is not None and user.user_id not in self._by_id:
+            self._by_id[user.user_id] = asyncio.get_running_loop().create_future()
+            self._by_id[user.user_id].set_result(user)
+
+    def _schedule_dispatch(self) -> None:
+        user_ids, self._queue = self._queue, []
+        futures = [self._by_id[user_id] for user_id in user_ids]
+        task = asyncio.ensure_future(self._dispatch(user_ids, futures))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, user_ids: list[UUID], futures: list) -> None:
+        try:
+            async with self._lock:
+                user_dal = UserDAL(self.session)
+                if len(user_ids) == 1:
+                    users = [await user_dal.get_user_by_id(user_ids[0])]
+                else:
+                    users = await user_dal.get_users_by_ids(user_ids)
+        except Exception as err:
+            for user_id, future in zip(user_ids, futures):
+                if self._by_id.get(user_id) is future:
+                    del self._by_id[user_id]
+                future.set_exception(err)
+            return
+        found = {user.user_id: user for user in users if user is not None}
+        for user_id, future in zip(user_ids, futures):
+            future.set_result(found.get(user_id))
+            if user_id in found:
+                self._by_email[found[user_id].email] = found[user_id]
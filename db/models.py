@@ -1,6 +1,10 @@
+import datetime
 import uuid
 
 from sqlalchemy import ARRAY
+from sqlalchemy import BigInteger
+from sqlalchemy import DateTime
+from sqlalchemy import Sequence
 from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
@@ -11,6 +15,8 @@ from utils.roles import PortalRole
 
 Base = declarative_base()
 
+user_version_seq = Sequence("user_version_seq", metadata=Base.metadata)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -26,6 +32,15 @@ class User(Base):
     roles: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
     rating: Mapped[int] = mapped_column(nullable=True, default=80)
     count_of_borrowed_books: Mapped[int] = mapped_column(nullable=True, default=0)
+    # Drawn from one sequence, so it grows per user and orders all user writes.
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=user_version_seq.next_value(),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
 
     # user_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     # name = Column(String, nullable=False)
@@ -52,3 +67,49 @@ class User(Base):
         if self.is_admin:
             return [role for role in self.roles if role != PortalRole.ROLE_PORTAL_ADMIN]
         return self.roles
+
+
+class RevokedToken(Base):
+    """Revoked access token (jti) or all tokens of a user issued until revoked_at"""
+
+    __tablename__ = "revoked_tokens"
+
+    revocation_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    jti: Mapped[str] = mapped_column(nullable=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+    revoked_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+class RefreshToken(Base):
+    """Issued refresh token; every rotation of one login shares the family_id"""
+
+    __tablename__ = "refresh_tokens"
+
+    jti: Mapped[str] = mapped_column(primary_key=True)
+    family_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), nullable=False, index=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class ServiceClient(Base):
+    """Registered service that authenticates with the client_credentials grant"""
+
+    __tablename__ = "service_clients"
+
+    client_id: Mapped[str] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(nullable=False)
+    secret_digest: Mapped[str] = mapped_column(nullable=False)
+    scopes: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
+    is_active: Mapped[bool] = mapped_column(default=True)
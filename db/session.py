@@ -1,10 +1,203 @@
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+from typing import Callable
+from typing import Sequence
+
+from sqlalchemy import Select
+from sqlalchemy import event
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from api.core.config import get_settings
+from api.core.metrics import DB_POOL_CHECKED_OUT
+from api.core.metrics import DB_POOL_SIZE
+from api.core.metrics import DB_POOL_TIMEOUTS
+from api.core.metrics import DB_POOL_WAIT_SECONDS
+from utils.cache import ExpiringLRUCache
+from utils.hedging import HedgedReader
 
 settings = get_settings()
 
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=False)
-async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and how often they time out"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Engines name their pool through pool_logging_name.
+        self.name = self._orig_logging_name or "primary"
+        DB_POOL_CHECKED_OUT.labels(self.name).set_function(self.checkedout)
+        DB_POOL_SIZE.labels(self.name).set(self.size())
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(self.name).observe(
+                time.perf_counter() - started
+            )
+
+
+def create_pooled_engine(url: str, name: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        future=True,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_logging_name=name,
+    )
+
+
+# Sessions of writers seen here within the window read from the primary, so
+# they see their own writes despite replication lag. Kept per worker process.
+recent_writers = ExpiringLRUCache(
+    name="recent_writers", max_entries=settings.READ_YOUR_WRITES_MAX_ENTRIES
+)
+
+
+class RoutingSession(Session):
+    """Session that sends plain reads to a replica and everything else to the primary.
+
+    Once a session writes, or belongs to a writer that wrote recently, all its
+    reads go to the primary as well. A session sticks to one replica. Sessions
+    of read-only units of work run their transactions as READ ONLY.
+    """
+
+    def __init__(self, *args, replicas: Sequence[AsyncEngine] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not _is_plain_read(clause):
+            self.info["primary"] = True
+            expires_at = time.time() + settings.READ_YOUR_WRITES_WINDOW_SECONDS
+            if "writer" in self.info:
+                recent_writers.set(self.info["writer"], True, expires_at=expires_at)
+        elif self.replicas and not self.info.get("primary"):
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas).sync_engine
+            return self._for_mode(self.info["replica"])
+        return self._for_mode(super().get_bind(mapper, clause=clause, **kwargs))
+
+    def _for_mode(self, bind: Engine) -> Engine:
+        if not self.info.get("read_only"):
+            return bind
+        if bind not in _read_only_engines:
+            _read_only_engines[bind] = bind.execution_options(postgresql_readonly=True)
+        return _read_only_engines[bind]
+
+
+_read_only_engines: dict[Engine, Engine] = {}
+
+
+def _is_plain_read(clause) -> bool:
+    # SELECTs wrapping a data-modifying CTE set the modifies_rows option.
+    return (
+        isinstance(clause, Select)
+        and clause._for_update_arg is None
+        and not clause.get_execution_options().get("modifies_rows")
+    )
+
+
+def track_writer(session: AsyncSession, email: str) -> None:
+    """Tie the session to a user so it reads from the primary after their writes"""
+    session.info["writer"] = email
+    if recent_writers.get(email) is not None:
+        session.info["primary"] = True
+
+
+async def _fetch_first(replica: AsyncEngine, statement) -> Any | None:
+    async with AsyncSession(replica, expire_on_commit=False) as session:
+        res = await session.execute(statement)
+        return res.scalars().first()
+
+
+hedged_reader = HedgedReader(
+    fetch=_fetch_first,
+    percentile=settings.DB_HEDGE_PERCENTILE,
+    min_delay=settings.DB_HEDGE_MIN_DELAY_SECONDS,
+)
+
+
+async def read_first(session: AsyncSession, statement) -> Any | None:
+    """First entity of a plain read, hedged across replicas when enabled.
+
+    Hedged reads run outside the session's transaction, so the returned
+    objects are not attached to it. Reads in a unit of work are not hedged:
+    they must see its snapshot and share its identity map.
+    """
+    replicas = getattr(session.sync_session, "replicas", ())
+    if (
+        settings.DB_HEDGED_READS
+        and len(replicas) > 1
+        and not session.info.get("primary")
+        and not session.info.get("unit_of_work")
+    ):
+        return await hedged_reader.read(statement, replicas)
+    res = await session.execute(statement)
+    return res.scalars().first()
+
+
+@asynccontextmanager
+async def transaction(session: AsyncSession):
+    """Transaction of an action; joins the request's unit of work if there is one"""
+    if session.info.get("unit_of_work"):
+        yield
+    else:
+        async with session.begin():
+            yield
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run callback once the session's transaction commits; drop it on rollback.
+
+    For in-memory state that must not run ahead of the database, e.g. when
+    the commit is left to the request's unit of work.
+    """
+    callbacks = session.info.get("after_commit")
+    if callbacks is None:
+        callbacks = session.info["after_commit"] = []
+        event.listen(session.sync_session, "after_commit", _run_after_commit)
+        event.listen(session.sync_session, "after_rollback", _drop_after_commit)
+    callbacks.append(callback)
+
+
+def _run_after_commit(session: Session) -> None:
+    callbacks, session.info["after_commit"] = session.info["after_commit"], []
+    for callback in callbacks:
+        callback()
+
+
+def _drop_after_commit(session: Session) -> None:
+    session.info["after_commit"].clear()
+
+
+engine = create_pooled_engine(settings.DATABASE_URL, "primary")
+replica_engines = [
+    create_pooled_engine(url, f"replica{number}")
+    for number, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+async_session = sessionmaker(
+    engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replica_engines,
+)
@@ -1,19 +1,61 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi import HTTPException
+from starlette_exporter import handle_metrics
 
 from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
 from api.core.exceptions import http_exception_handler
+from api.core.logging.logging_app import logger
 from api.core.middlewares import LoggingMiddleware
 from api.routers import router
+from api.v1.users.actions import user_changes_buffer
+from db.session import async_session
+from utils.hashing import apply_bcrypt_rounds
+from utils.hashing import calibrate_bcrypt_rounds
+from utils.sweeper import run_refresh_token_sweeper
 
 settings = get_settings()
 
-app = FastAPI(title="my-fastapi")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.HASHING_CALIBRATE_ON_STARTUP:
+        rounds = await asyncio.to_thread(
+            calibrate_bcrypt_rounds,
+            settings.HASHING_TARGET_MS,
+            settings.BCRYPT_MIN_ROUNDS,
+            settings.BCRYPT_MAX_ROUNDS,
+        )
+        logger.info(f"Calibrated bcrypt rounds: {apply_bcrypt_rounds(rounds)}")
+    sweeper = None
+    if settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS > 0:
+        sweeper = asyncio.create_task(
+            run_refresh_token_sweeper(
+                async_session,
+                settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+                settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE,
+            )
+        )
+    flusher = None
+    if settings.USER_WRITE_BEHIND:
+        flusher = asyncio.create_task(user_changes_buffer.run())
+    yield
+    if sweeper is not None:
+        sweeper.cancel()
+    if flusher is not None:
+        flusher.cancel()
+        await user_changes_buffer.flush()
+
+
+app = FastAPI(title="my-fastapi", lifespan=lifespan)
 app.add_middleware(LoggingMiddleware)
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.include_router(router)
+app.add_route("/metrics", handle_metrics)
 
 
 @app.get("/")
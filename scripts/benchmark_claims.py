@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jose import jwt
+
+from api.core.config import get_settings
+from utils.claims import compact_claims
+from utils.claims import expand_claims
+from utils.roles import PortalRole
+
+settings = get_settings()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare size and decode time of verbose and compact access tokens."
+    )
+    parser.add_argument("--iterations", type=int, default=10000)
+    return parser.parse_args(argv)
+
+
+def sample_claims() -> dict:
+    return {
+        "sub": "nikolai.sviridov@example.com",
+        "user_id": str(uuid.uuid4()),
+        "roles": [PortalRole.ROLE_PORTAL_USER, PortalRole.ROLE_PORTAL_SUPERADMIN],
+        "rating": 80,
+        "count_of_borrowed_books": 3,
+        "exp": 4102444800,
+        "iat": 1700000000,
+        "jti": uuid.uuid4().hex,
+    }
+
+
+def measure_decode_us(token: str, iterations: int, expand: bool) -> float:
+    def decode():
+        payload = jwt.decode(
+            token, settings.SECRET_KEY_FOR_ACCESS, algorithms=["HS256"]
+        )
+        return expand_claims(payload) if expand else payload
+
+    return timeit.timeit(decode, number=iterations) / iterations * 1e6
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    claims = sample_claims()
+    verbose = jwt.encode(claims, settings.SECRET_KEY_FOR_ACCESS, algorithm="HS256")
+    compact = jwt.encode(
+        compact_claims(claims), settings.SECRET_KEY_FOR_ACCESS, algorithm="HS256"
+    )
+    verbose_us = measure_decode_us(verbose, args.iterations, expand=False)
+    compact_us = measure_decode_us(compact, args.iterations, expand=True)
+    saved = len(verbose) - len(compact)
+    print(f"verbose: {len(verbose)} bytes, decode {verbose_us:.1f} us")
+    print(f"compact: {len(compact)} bytes, decode {compact_us:.1f} us (with expand)")
+    print(f"Saved {saved} bytes ({saved / len(verbose):.0%}) per Authorization header.")
+    return len(verbose), len(compact)
+
+
+if __name__ == "__main__":
+    main()
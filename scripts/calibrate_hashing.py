@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.core.config import get_settings
+from utils.hashing import calibrate_bcrypt_rounds
+from utils.hashing import measure_bcrypt_ms
+
+settings = get_settings()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pick bcrypt rounds that hash within a target latency on this host."
+    )
+    parser.add_argument("--target-ms", type=int, default=settings.HASHING_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+    parser.add_argument("--samples", type=int, default=3)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rounds = calibrate_bcrypt_rounds(
+        args.target_ms, args.min_rounds, args.max_rounds, args.samples
+    )
+    print(f"bcrypt rounds={rounds}: {measure_bcrypt_ms(rounds, args.samples):.1f} ms")
+    print(f"Target {args.target_ms} ms, security floor {args.min_rounds} rounds.")
+    print(f"Set BCRYPT_ROUNDS={rounds} for this node type.")
+    return rounds
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import os
+import secrets
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.core.dependencies import get_session
+from db.dals import ServiceClientDAL
+from utils.hashing import Hasher
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Register a service client for the client_credentials grant."
+    )
+    parser.add_argument("name")
+    parser.add_argument("--client-id", default=None)
+    parser.add_argument("--scope", action="append", default=[], dest="scopes")
+    return parser.parse_args(argv)
+
+
+async def create_service_client(client_id, name, scopes, session) -> str | None:
+    """Store a new service client and return its secret, which is not kept"""
+    client_secret = secrets.token_urlsafe(32)
+    async with session.begin():
+        service_client_dal = ServiceClientDAL(session)
+        if await service_client_dal.get_service_client(client_id) is not None:
+            print(f"Error: service client {client_id} already exists.")
+            return None
+        await service_client_dal.create_service_client(
+            client_id=client_id,
+            name=name,
+            secret_digest=Hasher.get_client_secret_digest(client_secret),
+            scopes=scopes,
+        )
+    return client_secret
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    client_id = args.client_id or secrets.token_hex(8)
+    async for session in get_session():
+        client_secret = await create_service_client(
+            client_id, args.name, args.scopes, session
+        )
+    if client_secret is not None:
+        print(f"client_id={client_id}")
+        print(f"client_secret={client_secret}")
+        print("Store the secret now, it cannot be shown again.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
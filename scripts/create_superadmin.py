@@ -95,7 +95,7 @@ async def create_superadmin(email, password, name, surname, session):
             name=name,
             surname=surname,
             email=email,
-            hashed_password=Hasher.get_password_hash(password),
+            hashed_password=await Hasher.get_password_hash_async(password),
             is_active=True,
             roles=[PortalRole.ROLE_PORTAL_SUPERADMIN],
         )
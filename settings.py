@@ -1,3 +1,5 @@
+import os
+
 from envparse import Env
 
 env = Env()
@@ -13,15 +15,154 @@ REAL_DATABASE_URL = env.str(
 )
 APP_PORT = env.int("APP_PORT", default=8001)
 
+# Connection pool of every database engine in each worker process. Keep
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers * replicas below max_connections.
+DB_POOL_SIZE: int = env.int("DB_POOL_SIZE", default=5)
+DB_MAX_OVERFLOW: int = env.int("DB_MAX_OVERFLOW", default=10)
+DB_POOL_TIMEOUT: float = env.float("DB_POOL_TIMEOUT", default=30.0)
+DB_POOL_RECYCLE: int = env.int("DB_POOL_RECYCLE", default=-1)  # seconds, -1 off
+DB_POOL_PRE_PING: bool = env.bool("DB_POOL_PRE_PING", default=False)
+
+# Plain reads go to these replicas when set. Users who wrote within the window
+# read from the primary so they see their own changes.
+DATABASE_REPLICA_URLS: list = env.list("DATABASE_REPLICA_URLS", default=[])
+READ_YOUR_WRITES_WINDOW_SECONDS: float = env.float(
+    "READ_YOUR_WRITES_WINDOW_SECONDS", default=5.0
+)
+READ_YOUR_WRITES_MAX_ENTRIES: int = env.int(
+    "READ_YOUR_WRITES_MAX_ENTRIES", default=10000
+)
+# User lookups slower than this percentile of recent ones are repeated on a
+# second replica (needs two or more replicas).
+DB_HEDGED_READS: bool = env.bool("DB_HEDGED_READS", default=False)
+DB_HEDGE_PERCENTILE: float = env.float("DB_HEDGE_PERCENTILE", default=95.0)
+DB_HEDGE_MIN_DELAY_SECONDS: float = env.float(
+    "DB_HEDGE_MIN_DELAY_SECONDS", default=0.002
+)
+
 SECRET_KEY_FOR_ACCESS: str = env.str(
     "SECRET_KEY_FOR_ACCESS", default="your-strong-access-secret-key"
 )
 SECRET_KEY_FOR_REFRESH: str = env.str(
     "SECRET_KEY_FOR_REFRESH", default="your-strong-refresh-secret-key"
 )
-ALGORITHM: str = env.str("ALGORITHM", default="HS256")
+ALGORITHM: str = env.str("ALGORITHM", default="HS256")  # access tokens
+# Asymmetric access token signing (ES256/RS256): PEM private key and key id.
+ACCESS_TOKEN_PRIVATE_KEY_PATH: str = env.str(
+    "ACCESS_TOKEN_PRIVATE_KEY_PATH", default=""
+)
+ACCESS_TOKEN_KEY_ID: str = env.str("ACCESS_TOKEN_KEY_ID", default="")
+REFRESH_TOKEN_ALGORITHM: str = env.str(
+    "REFRESH_TOKEN_ALGORITHM",
+    default=ALGORITHM if ALGORITHM.startswith("HS") else "HS256",
+)
+# JSON key ring with per token type "current" kid and "keys"; replaces the
+# single-key settings above and is reloaded when the file changes.
+JWT_KEYRING_PATH: str = env.str("JWT_KEYRING_PATH", default="")
+JWT_KEYRING_RELOAD_INTERVAL_SECONDS: int = env.int(
+    "JWT_KEYRING_RELOAD_INTERVAL_SECONDS", default=10
+)
+JWKS_MAX_AGE_SECONDS: int = env.int("JWKS_MAX_AGE_SECONDS", default=300)
 ACCESS_TOKEN_EXPIRE_MINUTES: int = env.int("ACCESS_TOKEN_EXPIRE_MINUTES", default=30)
 REFRESH_TOKEN_EXPIRE_DAYS: int = env.int("ACCESS_TOKEN_EXPIRE_MINUTES", default=10)
+# Expired rows of the refresh token store are deleted in batches; 0 disables.
+REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: float = env.float(
+    "REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS", default=600.0
+)
+REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = env.int(
+    "REFRESH_TOKEN_SWEEP_BATCH_SIZE", default=1000
+)
+ACCESS_TOKEN_CACHE_MAX_ENTRIES: int = env.int(
+    "ACCESS_TOKEN_CACHE_MAX_ENTRIES", default=10000
+)
+# Revoked tokens are mirrored in every worker and refreshed at this interval.
+REVOCATION_REFRESH_INTERVAL_SECONDS: float = env.float(
+    "REVOCATION_REFRESH_INTERVAL_SECONDS", default=5.0
+)
+# Revocation ids are re-read for this long, so a revocation that commits after
+# one with a higher id is still picked up; must exceed the longest revoking
+# transaction.
+REVOCATION_REFRESH_LOOKBACK_SECONDS: float = env.float(
+    "REVOCATION_REFRESH_LOOKBACK_SECONDS", default=60.0
+)
+REVOCATION_BLOOM_CAPACITY: int = env.int("REVOCATION_BLOOM_CAPACITY", default=100000)
+REVOCATION_BLOOM_ERROR_RATE: float = env.float(
+    "REVOCATION_BLOOM_ERROR_RATE", default=0.001
+)
+INTROSPECTION_MAX_TOKENS: int = env.int("INTROSPECTION_MAX_TOKENS", default=100)
+BORROWED_BOOKS_BATCH_MAX_USERS: int = env.int(
+    "BORROWED_BOOKS_BATCH_MAX_USERS", default=100
+)
+# Buffer admin rating changes per user and apply them in batches. Accepted
+# changes are lost if a worker dies before the next flush and are not visible
+# to reads until then (see utils/write_behind.py).
+USER_WRITE_BEHIND: bool = env.bool("USER_WRITE_BEHIND", default=False)
+USER_WRITE_BEHIND_INTERVAL_SECONDS: float = env.float(
+    "USER_WRITE_BEHIND_INTERVAL_SECONDS", default=1.0
+)
+USER_WRITE_BEHIND_MAX_ENTRIES: int = env.int(
+    "USER_WRITE_BEHIND_MAX_ENTRIES", default=1000
+)
+# Hard cap while flushes fail; writes of further users get 503.
+USER_WRITE_BEHIND_MAX_PENDING: int = env.int(
+    "USER_WRITE_BEHIND_MAX_PENDING", default=10000
+)
+# Short claim names, a roles bitmask and a base64url user id in access tokens.
+# Verifiers outside this service must expand them (see utils/claims.py).
+ACCESS_TOKEN_COMPACT_CLAIMS: bool = env.bool(
+    "ACCESS_TOKEN_COMPACT_CLAIMS", default=False
+)
+# Users' token claims cached for refreshes; writes on other workers show up
+# after at most this TTL.
+USER_CLAIMS_CACHE_TTL_SECONDS: int = env.int(
+    "USER_CLAIMS_CACHE_TTL_SECONDS", default=30
+)
+USER_CLAIMS_CACHE_MAX_ENTRIES: int = env.int(
+    "USER_CLAIMS_CACHE_MAX_ENTRIES", default=10000
+)
+USER_VERSIONS_REFRESH_INTERVAL_SECONDS: float = env.float(
+    "USER_VERSIONS_REFRESH_INTERVAL_SECONDS", default=5.0
+)
+# User versions are re-read for this long, so a write that commits after one
+# with a higher version is still picked up; must exceed the longest user write
+# transaction.
+USER_VERSIONS_REFRESH_LOOKBACK_SECONDS: float = env.float(
+    "USER_VERSIONS_REFRESH_LOOKBACK_SECONDS", default=60.0
+)
+# Build the current user from access token claims instead of loading the row.
+# Role changes are then seen only when the user gets a new access token.
+AUTH_STATELESS_PRINCIPAL: bool = env.bool("AUTH_STATELESS_PRINCIPAL", default=False)
+
+# Service clients use the client_credentials grant; their secrets are HMACed.
+SERVICE_CLIENT_SECRET_KEY: str = env.str(
+    "SERVICE_CLIENT_SECRET_KEY", default="your-strong-client-secret-key"
+)
+SERVICE_TOKEN_EXPIRE_MINUTES: int = env.int(
+    "SERVICE_TOKEN_EXPIRE_MINUTES", default=24 * 60
+)
+SERVICE_TOKEN_CACHE_MAX_ENTRIES: int = env.int(
+    "SERVICE_TOKEN_CACHE_MAX_ENTRIES", default=1000
+)
+
+PASSWORD_HASH_SCHEMES: list = env.list("PASSWORD_HASH_SCHEMES", default=["bcrypt"])
+BCRYPT_ROUNDS: int = env.int("BCRYPT_ROUNDS", default=12)
+BCRYPT_MIN_ROUNDS: int = env.int("BCRYPT_MIN_ROUNDS", default=10)  # security floor
+BCRYPT_MAX_ROUNDS: int = env.int("BCRYPT_MAX_ROUNDS", default=16)
+HASHING_TARGET_MS: int = env.int("HASHING_TARGET_MS", default=150)
+HASHING_CALIBRATE_ON_STARTUP: bool = env.bool(
+    "HASHING_CALIBRATE_ON_STARTUP", default=False
+)
+HASHING_THREAD_POOL_SIZE: int = env.int(
+    "HASHING_THREAD_POOL_SIZE", default=os.cpu_count() or 1
+)
+
+LOGIN_MAX_CONCURRENT_VERIFICATIONS: int = env.int(
+    "LOGIN_MAX_CONCURRENT_VERIFICATIONS", default=2 * (os.cpu_count() or 1)
+)
+LOGIN_MAX_QUEUE_WAIT_SECONDS: float = env.float(
+    "LOGIN_MAX_QUEUE_WAIT_SECONDS", default=1.0
+)
+LOGIN_RETRY_AFTER_SECONDS: int = env.int("LOGIN_RETRY_AFTER_SECONDS", default=1)
 
 TEST_DATABASE_URL = env.str(
     "TEST_DATABASE_URL",
@@ -6,6 +6,7 @@ from typing import Any
 from typing import AsyncGenerator
 
 import asyncpg
+import ecdsa
 import pytest
 import sqlalchemy
 from alembic import command
@@ -18,10 +19,14 @@ from sqlalchemy.orm import sessionmaker
 
 from api.core.config import get_settings
 from api.core.dependencies import get_session
+from api.v1.auth.services.ServiceClientService import service_token_cache
+from api.v1.users.actions import user_claims_cache
 from main import app
 from utils.hashing import Hasher
 from utils.jwt import JWT
+from utils.revocation import revocation_list
 from utils.roles import PortalRole
+from utils.user_versions import user_versions
 
 
 settings = get_settings()
@@ -34,6 +39,9 @@ CHANGE_COUNT_OF_BORROWED_BOOKS = "change_count_of_borrowed_books/"
 
 CLEAN_TABLES = [
     "users",
+    "revoked_tokens",
+    "refresh_tokens",
+    "service_clients",
 ]
 
 
@@ -69,6 +77,10 @@ async def clean_tables(async_session_test):
                 await session.execute(
                     sqlalchemy.text(f"""TRUNCATE TABLE {table_for_cleaning};""")
                 )
+    revocation_list.clear()
+    service_token_cache.clear()
+    user_claims_cache.clear()
+    user_versions.clear()
 
 
 async def _get_test_session():
@@ -136,6 +148,38 @@ async def create_user_in_database(asyncpg_pool):
     return create_user_in_database
 
 
+@pytest.fixture
+async def create_service_client_in_database(asyncpg_pool):
+    async def create_service_client_in_database(client: dict):
+        async with asyncpg_pool.acquire() as connection:
+            return await connection.execute(
+                """INSERT INTO service_clients VALUES ($1, $2, $3, $4, $5)""",
+                client["client_id"],
+                client.get("name", client["client_id"]),
+                Hasher.get_client_secret_digest(client["client_secret"]),
+                client.get("scopes", []),
+                client.get("is_active", True),
+            )
+
+    return create_service_client_in_database
+
+
+@pytest.fixture
+def es256_access_key(tmp_path, monkeypatch):
+    private_key_path = tmp_path / "access_es256.pem"
+    private_key_path.write_bytes(
+        ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem()
+    )
+    monkeypatch.setattr(settings, "ALGORITHM", "ES256")
+    monkeypatch.setattr(
+        settings, "ACCESS_TOKEN_PRIVATE_KEY_PATH", str(private_key_path)
+    )
+    JWT.load_keys()
+    yield JWT.keys["access"].current
+    monkeypatch.undo()
+    JWT.load_keys()
+
+
 async def create_test_jwt_token_for_user(email: str, token_type) -> str:
     token = await JWT.create_jwt_token(data={"sub": email}, token_type=token_type)
     return token
@@ -146,6 +190,14 @@ async def create_test_auth_headers_for_user(email: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {access_token}"}
 
 
+async def create_test_service_auth_headers(scope: str) -> dict[str, str]:
+    token = await JWT.create_jwt_token(
+        data={"sub": "client:test", "client_id": "test", "scope": scope},
+        token_type="access",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
 async def get_test_data_from_jwt_token(token: str, token_type: str) -> str:
     token_key = (
         settings.SECRET_KEY_FOR_ACCESS
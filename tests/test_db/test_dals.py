@@ -0,0 +1,80 @@
+import uuid
+
+from db.dals import AdminChange
+from db.dals import UserDAL
+from utils.roles import PortalRole
+
+
+async def test_create_user_returns_none_for_taken_email(async_session_test):
+    user_data = {
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "hashed_password": "hashed",
+        "roles": [PortalRole.ROLE_PORTAL_USER],
+    }
+
+    async with async_session_test() as session:
+        async with session.begin():
+            user_dal = UserDAL(session)
+            created_user = await user_dal.create_user(**user_data)
+            duplicate_user = await user_dal.create_user(
+                **{**user_data, "name": "Nikolaii"}
+            )
+            # The conflict does not abort the transaction.
+            found_user = await user_dal.get_user_by_email(user_data["email"])
+
+    assert created_user.email == user_data["email"]
+    assert created_user.rating == 80
+    assert duplicate_user is None
+    assert found_user.name == "Nikolai"
+
+
+async def test_apply_admin_changes_updates_permitted_fields(
+    async_session_test, create_user_in_database, get_user_from_database
+):
+    admin_id = uuid.uuid4()
+    superadmin_id = uuid.uuid4()
+    users = [
+        {"roles": [PortalRole.ROLE_PORTAL_USER]},
+        {"roles": [PortalRole.ROLE_PORTAL_USER]},
+        {"roles": [PortalRole.ROLE_PORTAL_SUPERADMIN]},
+        {"roles": [PortalRole.ROLE_PORTAL_USER, PortalRole.ROLE_PORTAL_ADMIN]},
+    ]
+    for number, user in enumerate(users):
+        user.update(
+            user_id=uuid.uuid4(),
+            name="Nikolai",
+            surname="Sviridov",
+            email=f"user{number}@kek.com",
+            password="Abcd12!@",
+            is_active=True,
+            rating=80,
+            count_of_borrowed_books=1,
+        )
+        await create_user_in_database(user)
+
+    def by_admin(value):
+        return AdminChange(value, admin_id, False)
+
+    async with async_session_test() as session:
+        async with session.begin():
+            updated_user_ids = await UserDAL(session).apply_admin_changes(
+                {
+                    users[0]["user_id"]: {"rating": by_admin(50)},
+                    users[1]["user_id"]: {"rating": by_admin(60)},
+                    users[2]["user_id"]: {"rating": by_admin(10)},
+                    # An admin may not change another admin; a superadmin may.
+                    users[3]["user_id"]: {
+                        "rating": AdminChange(20, superadmin_id, True)
+                    },
+                }
+            )
+
+    assert set(updated_user_ids) == {
+        users[0]["user_id"],
+        users[1]["user_id"],
+        users[3]["user_id"],
+    }
+    rows = [dict((await get_user_from_database(u["user_id"]))[0]) for u in users]
+    assert [row["rating"] for row in rows] == [50, 60, 80, 20]
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy import event
+
+from db.loaders import UserLoader
+from db.models import User
+
+
+async def test_user_loader_batches_and_memoizes_lookups(
+    async_session_test, create_user_in_database
+):
+    users = [
+        {
+            "user_id": uuid.uuid4(),
+            "name": f"Name{number}",
+            "surname": f"Surname{number}",
+            "email": f"user{number}@example.com",
+            "is_active": True,
+            "password": "SamplePass1!",
+        }
+        for number in range(2)
+    ]
+    for user in users:
+        await create_user_in_database(user)
+    user_queries = []
+
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    async with async_session_test() as session:
+        sync_engine = session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record_query)
+        try:
+            loader = UserLoader.for_session(session)
+            first, second, missing = await asyncio.gather(
+                loader.load(users[0]["user_id"]),
+                loader.load(users[1]["user_id"]),
+                loader.load(uuid.uuid4()),
+            )
+            by_email = await loader.load_by_email(users[1]["email"])
+            again = await loader.load(users[0]["user_id"])
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record_query)
+
+    assert first.email == users[0]["email"]
+    assert second.email == users[1]["email"]
+    assert missing is None
+    assert by_email is second
+    assert again is first
+    assert len(user_queries) == 1
+    assert "ANY" in user_queries[0]
+
+
+async def test_user_loader_reloads_after_clear(
+    async_session_test, create_user_in_database
+):
+    user = {
+        "user_id": uuid.uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "is_active": True,
+        "password": "SamplePass1!",
+    }
+    await create_user_in_database(user)
+
+    async with async_session_test() as session:
+        loader = UserLoader.for_session(session)
+        assert await loader.load_by_email(user["email"]) is not None
+        await session.execute(delete(User))
+        assert await loader.load_by_email(user["email"]) is not None
+        loader.clear()
+        assert await loader.load_by_email(user["email"]) is None
@@ -0,0 +1,161 @@
+import uuid
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.util import greenlet_spawn
+
+from api.core.metrics import DB_POOL_TIMEOUTS
+from db.models import User
+from db import session as db_session
+from db.session import after_commit
+from db.session import InstrumentedQueuePool
+from db.session import read_first
+from db.session import RoutingSession
+from db.session import track_writer
+from db.session import transaction
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeResult:
+    def scalars(self):
+        return self
+
+    def first(self):
+        return None
+
+
+async def test_pool_counts_checkout_timeouts():
+    pool = InstrumentedQueuePool(
+        FakeConnection, pool_size=1, max_overflow=0, timeout=0.01, logging_name="test"
+    )
+    timeouts = DB_POOL_TIMEOUTS.labels("test")._value.get()
+
+    connection = await greenlet_spawn(pool.connect)
+    assert pool.checkedout() == 1
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    await greenlet_spawn(connection.close)
+
+    assert pool.checkedout() == 0
+    assert DB_POOL_TIMEOUTS.labels("test")._value.get() == timeouts + 1
+
+
+def _routing_sessionmaker(replica_count: int = 1):
+    primary = create_async_engine("postgresql+asyncpg://primary/db")
+    replicas = [
+        create_async_engine(f"postgresql+asyncpg://replica{number}/db")
+        for number in range(replica_count)
+    ]
+    replica = replicas[0]
+    session_factory = sessionmaker(
+        primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+    )
+    return session_factory, primary.sync_engine, replica.sync_engine
+
+
+async def test_routing_session_sends_reads_to_replica_and_writes_to_primary():
+    session_factory, primary, replica = _routing_sessionmaker()
+    session = session_factory().sync_session
+
+    assert session.get_bind(clause=select(User)) is replica
+    assert session.get_bind(clause=select(User).with_for_update()) is primary
+    assert session.get_bind(clause=update(User)) is primary
+    assert (
+        session_factory().sync_session.get_bind(
+            clause=select(User).execution_options(modifies_rows=True)
+        )
+        is primary
+    )
+    # Reads after a write in the same session see it.
+    assert session.get_bind(clause=select(User)) is primary
+
+
+async def test_writer_reads_from_primary_after_writing():
+    session_factory, primary, replica = _routing_sessionmaker()
+    email = f"{uuid.uuid4()}@example.com"
+
+    first = session_factory()
+    track_writer(first, email)
+    first.sync_session.get_bind(clause=update(User))
+
+    second = session_factory()
+    track_writer(second, email)
+    other_user = session_factory()
+    track_writer(other_user, "other@example.com")
+
+    assert second.sync_session.get_bind(clause=select(User)) is primary
+    assert other_user.sync_session.get_bind(clause=select(User)) is replica
+
+
+async def test_actions_join_the_unit_of_work_transaction():
+    session_factory, primary, replica = _routing_sessionmaker()
+    session = session_factory()
+    session.info["unit_of_work"] = True
+
+    async with transaction(session):
+        await session.begin()
+        async with transaction(session):
+            assert session.in_transaction()
+    assert session.in_transaction()
+
+
+async def test_read_only_unit_of_work_uses_read_only_engines():
+    session_factory, primary, replica = _routing_sessionmaker()
+    session = session_factory()
+    session.info["read_only"] = True
+
+    read_bind = session.sync_session.get_bind(clause=select(User))
+
+    assert read_bind.get_execution_options()["postgresql_readonly"] is True
+    assert read_bind.pool is replica.pool
+
+
+async def test_reads_in_a_unit_of_work_are_not_hedged(monkeypatch):
+    session_factory, primary, replica = _routing_sessionmaker(replica_count=2)
+    session = session_factory()
+    session.info["unit_of_work"] = True
+    monkeypatch.setattr(db_session.settings, "DB_HEDGED_READS", True)
+    executed = []
+
+    async def hedged_read(statement, replicas):
+        raise AssertionError("read was hedged")
+
+    async def execute(statement):
+        executed.append(statement)
+        return FakeResult()
+
+    monkeypatch.setattr(db_session.hedged_reader, "read", hedged_read)
+    monkeypatch.setattr(session, "execute", execute)
+
+    assert await read_first(session, select(User)) is None
+    assert len(executed) == 1
+
+
+async def test_after_commit_callbacks_run_on_commit_only():
+    session_factory, primary, replica = _routing_sessionmaker()
+    session = session_factory()
+    calls = []
+
+    async with session.begin():
+        after_commit(session, lambda: calls.append("rolled back"))
+        await session.rollback()
+    async with session.begin():
+        after_commit(session, lambda: calls.append("committed"))
+        assert calls == []
+
+    assert calls == ["committed"]
@@ -0,0 +1,200 @@
+from uuid import uuid4
+
+import pytest
+
+from api.core.config import get_settings
+from api.v1.users.actions import user_changes_buffer
+from tests.conftest import CHANGE_COUNT_OF_BORROWED_BOOKS
+from tests.conftest import CHANGE_RATING_URL
+from tests.conftest import create_test_auth_headers_for_user
+from tests.conftest import USER_URL
+from utils.roles import PortalRole
+
+settings = get_settings()
+
+
+def _user_data(**overrides) -> dict:
+    return {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": f"{uuid4().hex}@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+        **overrides,
+    }
+
+
+ADMIN_ROLES = [PortalRole.ROLE_PORTAL_ADMIN]
+
+
+@pytest.mark.parametrize(
+    "url, count_before, count_after",
+    [("borrow_book", 3, 4), ("return_book", 3, 2)],
+)
+async def test_borrow_and_return_book(
+    client,
+    create_user_in_database,
+    get_user_from_database,
+    url,
+    count_before,
+    count_after,
+):
+    user_data = _user_data(count_of_borrowed_books=count_before)
+    admin_data = _user_data(roles=ADMIN_ROLES)
+    await create_user_in_database(user_data)
+    await create_user_in_database(admin_data)
+
+    resp = client.post(
+        f"{USER_URL}{url}?user_id={user_data['user_id']}",
+        headers=await create_test_auth_headers_for_user(admin_data["email"]),
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == str(user_data["user_id"])
+    user_from_db = dict((await get_user_from_database(user_data["user_id"]))[0])
+    assert user_from_db["count_of_borrowed_books"] == count_after
+
+
+@pytest.mark.parametrize(
+    "url, count_before, expected_detail",
+    [
+        ("borrow_book", 10, "already borrowed 10 books."),
+        ("return_book", 0, "has no borrowed books."),
+    ],
+)
+async def test_borrow_and_return_book_out_of_range(
+    client,
+    create_user_in_database,
+    get_user_from_database,
+    url,
+    count_before,
+    expected_detail,
+):
+    user_data = _user_data(count_of_borrowed_books=count_before)
+    admin_data = _user_data(roles=ADMIN_ROLES)
+    await create_user_in_database(user_data)
+    await create_user_in_database(admin_data)
+
+    resp = client.post(
+        f"{USER_URL}{url}?user_id={user_data['user_id']}",
+        headers=await create_test_auth_headers_for_user(admin_data["email"]),
+    )
+
+    assert resp.status_code == 409
+    assert resp.json() == {
+        "detail": f"User with email {user_data['email']} {expected_detail}"
+    }
+    user_from_db = dict((await get_user_from_database(user_data["user_id"]))[0])
+    assert user_from_db["count_of_borrowed_books"] == count_before
+
+
+async def test_borrow_book_of_admin_by_admin_forbidden(client, create_user_in_database):
+    user_data = _user_data(roles=ADMIN_ROLES)
+    admin_data = _user_data(roles=ADMIN_ROLES)
+    await create_user_in_database(user_data)
+    await create_user_in_database(admin_data)
+
+    resp = client.post(
+        f"{USER_URL}borrow_book?user_id={user_data['user_id']}",
+        headers=await create_test_auth_headers_for_user(admin_data["email"]),
+    )
+
+    assert resp.status_code == 403
+
+
+async def test_borrow_books_batch(
+    client, create_user_in_database, get_user_from_database
+):
+    users = [
+        _user_data(count_of_borrowed_books=0),
+        _user_data(count_of_borrowed_books=9),
+        _user_data(count_of_borrowed_books=10),
+    ]
+    admin_data = _user_data(roles=ADMIN_ROLES)
+    for user_data in [*users, admin_data]:
+        await create_user_in_database(user_data)
+    missing_user_id = uuid4()
+
+    resp = client.post(
+        f"{USER_URL}borrow_books",
+        headers=await create_test_auth_headers_for_user(admin_data["email"]),
+        json={
+            "user_ids": [str(user["user_id"]) for user in users]
+            + [str(missing_user_id)]
+        },
+    )
+
+    assert resp.status_code == 200
+    resp_data = resp.json()
+    assert set(resp_data["changed_user_ids"]) == {
+        str(users[0]["user_id"]),
+        str(users[1]["user_id"]),
+    }
+    assert resp_data["rejected_user_ids"] == [
+        str(users[2]["user_id"]),
+        str(missing_user_id),
+    ]
+    counts = [
+        dict((await get_user_from_database(user["user_id"]))[0])[
+            "count_of_borrowed_books"
+        ]
+        for user in users
+    ]
+    assert counts == [1, 10, 10]
+
+
+async def test_return_books_batch_requires_admin(client, create_user_in_database):
+    user_data = _user_data(count_of_borrowed_books=2)
+    await create_user_in_database(user_data)
+
+    resp = client.post(
+        f"{USER_URL}return_books",
+        headers=await create_test_auth_headers_for_user(user_data["email"]),
+        json={"user_ids": [str(user_data["user_id"])]},
+    )
+
+    assert resp.status_code == 403
+
+
+async def test_write_behind_buffers_rating_but_not_borrowed_books_count(
+    client,
+    create_user_in_database,
+    get_user_from_database,
+    async_session_test,
+    monkeypatch,
+):
+    user_data = _user_data(rating=80, count_of_borrowed_books=1)
+    admin_data = _user_data(roles=ADMIN_ROLES)
+    await create_user_in_database(user_data)
+    await create_user_in_database(admin_data)
+    monkeypatch.setattr(settings, "USER_WRITE_BEHIND", True)
+    monkeypatch.setattr(user_changes_buffer, "session_factory", async_session_test)
+    headers = await create_test_auth_headers_for_user(admin_data["email"])
+
+    rating_resp = client.post(
+        f"{USER_URL}{CHANGE_RATING_URL}?user_id={user_data['user_id']}",
+        headers=headers,
+        json={"rating": 70},
+    )
+    count_resp = client.post(
+        f"{USER_URL}{CHANGE_COUNT_OF_BORROWED_BOOKS}?user_id={user_data['user_id']}",
+        headers=headers,
+        json={"count_of_borrowed_books": 3},
+    )
+    borrow_resp = client.post(
+        f"{USER_URL}borrow_book?user_id={user_data['user_id']}", headers=headers
+    )
+
+    assert rating_resp.status_code == 202
+    assert count_resp.status_code == 200
+    assert borrow_resp.status_code == 200
+    user_from_db = dict((await get_user_from_database(user_data["user_id"]))[0])
+    assert user_from_db["rating"] == 80
+    assert user_from_db["count_of_borrowed_books"] == 4
+
+    await user_changes_buffer.flush()
+
+    user_from_db = dict((await get_user_from_database(user_data["user_id"]))[0])
+    assert user_from_db["rating"] == 70
+    assert user_from_db["count_of_borrowed_books"] == 4
@@ -0,0 +1,76 @@
+import pytest
+
+from tests.conftest import get_test_data_from_jwt_token
+from tests.conftest import LOGIN_URL
+
+CLIENT_TOKEN_URL = f"{LOGIN_URL}client_token"
+
+SERVICE_CLIENT = {
+    "client_id": "library",
+    "client_secret": "library-secret",
+    "scopes": ["introspect", "users:read"],
+}
+
+
+async def test_client_credentials_grant(client, create_service_client_in_database):
+    await create_service_client_in_database(SERVICE_CLIENT)
+    resp = client.post(
+        CLIENT_TOKEN_URL,
+        data={
+            "grant_type": "client_credentials",
+            "client_id": SERVICE_CLIENT["client_id"],
+            "client_secret": SERVICE_CLIENT["client_secret"],
+            "scope": "introspect",
+        },
+    )
+
+    assert resp.status_code == 200
+    resp_data = resp.json()
+    assert resp_data["token_type"] == "bearer"
+    assert resp_data["scope"] == "introspect"
+    payload = await get_test_data_from_jwt_token(resp_data["access_token"], "access")
+    assert payload["client_id"] == SERVICE_CLIENT["client_id"]
+    assert payload["scope"] == "introspect"
+
+
+async def test_client_credentials_grant_reuses_cached_token(
+    client, create_service_client_in_database
+):
+    await create_service_client_in_database(SERVICE_CLIENT)
+    data = {
+        "grant_type": "client_credentials",
+        "client_id": SERVICE_CLIENT["client_id"],
+        "client_secret": SERVICE_CLIENT["client_secret"],
+    }
+
+    first = client.post(CLIENT_TOKEN_URL, data=data).json()
+    second = client.post(CLIENT_TOKEN_URL, data=data).json()
+
+    assert first["scope"] == "introspect users:read"
+    assert second["access_token"] == first["access_token"]
+
+
+@pytest.mark.parametrize(
+    "data, expected_status_code",
+    [
+        ({"client_secret": "wrong-secret"}, 401),
+        ({"client_id": "unknown"}, 401),
+        ({"scope": "users:write"}, 400),
+        ({"grant_type": "password"}, 400),
+    ],
+)
+async def test_client_credentials_grant_error(
+    client, create_service_client_in_database, data, expected_status_code
+):
+    await create_service_client_in_database(SERVICE_CLIENT)
+    resp = client.post(
+        CLIENT_TOKEN_URL,
+        data={
+            "grant_type": "client_credentials",
+            "client_id": SERVICE_CLIENT["client_id"],
+            "client_secret": SERVICE_CLIENT["client_secret"],
+            **data,
+        },
+    )
+
+    assert resp.status_code == expected_status_code
@@ -304,3 +304,21 @@ async def test_reject_delete_superadmin(
     assert resp.json() == {"detail": "Superadmin cannot be deleted via API."}
     user_form_database = await get_user_from_database(user_data_for_deletion["user_id"])
     assert PortalRole.ROLE_PORTAL_SUPERADMIN in dict(user_form_database[0])["roles"]
+
+
+async def test_deleted_user_token_is_revoked(client, create_user_in_database):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    headers = await create_test_auth_headers_for_user(user_data["email"])
+    resp = client.delete(f"{USER_URL}?user_id={user_data['user_id']}", headers=headers)
+    assert resp.status_code == 200
+
+    resp = client.get(f"{USER_URL}?user_id={user_data['user_id']}", headers=headers)
+    assert resp.status_code == 401
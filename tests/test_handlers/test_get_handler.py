@@ -2,9 +2,15 @@ from uuid import uuid4
 
 import pytest
 
+from api.core.config import get_settings
 from tests.conftest import create_test_auth_headers_for_user
 from tests.conftest import USER_URL
+from utils.cursor import TrailingCursor
+from utils.jwt import JWT
 from utils.roles import PortalRole
+from utils.user_versions import user_versions
+
+settings = get_settings()
 
 
 async def test_get_user_by_himself(client, create_user_in_database):
@@ -376,3 +382,107 @@ async def test_get_another_user_error(
         headers=await create_test_auth_headers_for_user(user_who_get["email"]),
     )
     assert reps.status_code == 403
+
+
+async def test_get_user_by_admin_with_stateless_principal(
+    client, create_user_in_database, monkeypatch
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+        "rating": 80,
+        "count_of_borrowed_books": 2,
+    }
+    await create_user_in_database(user_data)
+    # The admin exists only in token claims, so the request must not load
+    # the current user from the database.
+    admin_token = await JWT.create_jwt_token(
+        data={
+            "sub": "lol1@kek.com",
+            "user_id": str(uuid4()),
+            "roles": [PortalRole.ROLE_PORTAL_ADMIN],
+            "rating": 80,
+            "count_of_borrowed_books": 0,
+        },
+        token_type="access",
+    )
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    resp = client.get(f"{USER_URL}?user_id={user_data['user_id']}", headers=headers)
+    assert resp.status_code == 401
+
+    monkeypatch.setattr(settings, "AUTH_STATELESS_PRINCIPAL", True)
+    # A worker that has been up long enough trusts tokens of unchanged users.
+    monkeypatch.setattr(user_versions, "_cursor", TrailingCursor(lookback=0))
+    monkeypatch.setattr(user_versions, "_complete_since", 0.0)
+    resp = client.get(f"{USER_URL}?user_id={user_data['user_id']}", headers=headers)
+    assert resp.status_code == 200
+    user_from_response = resp.json()
+    assert user_from_response["user_id"] == str(user_data["user_id"])
+    assert user_from_response["rating"] == user_data["rating"]
+
+
+async def test_get_user_with_stateless_principal_falls_back_to_database(
+    client, create_user_in_database, monkeypatch
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    monkeypatch.setattr(settings, "AUTH_STATELESS_PRINCIPAL", True)
+
+    resp = client.get(
+        f"{USER_URL}?user_id={user_data['user_id']}",
+        headers=await create_test_auth_headers_for_user(user_data["email"]),
+    )
+    assert resp.status_code == 200
+    assert resp.json()["user_id"] == str(user_data["user_id"])
+
+
+async def test_get_user_with_stale_stateless_principal_uses_database(
+    client, create_user_in_database, monkeypatch
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    demoted_admin_data = {
+        "user_id": uuid4(),
+        "name": "Admin",
+        "surname": "Adminov",
+        "email": "lol1@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    await create_user_in_database(demoted_admin_data)
+    # Claims from before the admin role was revoked, with an old user version.
+    admin_token = await JWT.create_jwt_token(
+        data={
+            "sub": demoted_admin_data["email"],
+            "user_id": str(demoted_admin_data["user_id"]),
+            "roles": [PortalRole.ROLE_PORTAL_USER, PortalRole.ROLE_PORTAL_ADMIN],
+            "ver": 0,
+        },
+        token_type="access",
+    )
+    monkeypatch.setattr(settings, "AUTH_STATELESS_PRINCIPAL", True)
+
+    resp = client.get(
+        f"{USER_URL}?user_id={user_data['user_id']}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert resp.status_code == 403
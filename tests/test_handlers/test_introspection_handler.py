@@ -0,0 +1,80 @@
+from uuid import uuid4
+
+from tests.conftest import create_test_jwt_token_for_user
+from tests.conftest import create_test_service_auth_headers
+from tests.conftest import LOGIN_URL
+
+
+async def test_introspect_tokens(client, create_user_in_database):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    access_token = await create_test_jwt_token_for_user(user_data["email"], "access")
+    refresh_token = await create_test_jwt_token_for_user(user_data["email"], "refresh")
+
+    resp = client.post(
+        f"{LOGIN_URL}introspect",
+        json={"tokens": [access_token, refresh_token, "not-a-token"]},
+        headers=await create_test_service_auth_headers("introspect"),
+    )
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["active"] is True
+    assert results[0]["claims"]["sub"] == user_data["email"]
+    assert results[1:] == [
+        {"active": False, "claims": None},
+        {"active": False, "claims": None},
+    ]
+
+
+async def test_introspect_revoked_token(client, create_user_in_database):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    access_token = await create_test_jwt_token_for_user(user_data["email"], "access")
+    resp = client.post(
+        f"{LOGIN_URL}logout", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert resp.status_code == 204
+
+    resp = client.post(
+        f"{LOGIN_URL}introspect",
+        json={"tokens": [access_token]},
+        headers=await create_test_service_auth_headers("introspect"),
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"results": [{"active": False, "claims": None}]}
+
+
+async def test_introspect_empty_batch(client):
+    resp = client.post(
+        f"{LOGIN_URL}introspect",
+        json={"tokens": []},
+        headers=await create_test_service_auth_headers("introspect"),
+    )
+
+    assert resp.status_code == 422
+
+
+async def test_introspect_requires_introspect_scope(client):
+    resp = client.post(
+        f"{LOGIN_URL}introspect",
+        json={"tokens": ["not-a-token"]},
+        headers=await create_test_service_auth_headers("users:read"),
+    )
+
+    assert resp.status_code == 403
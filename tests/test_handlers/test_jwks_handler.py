@@ -0,0 +1,35 @@
+from jose import jwt
+
+from tests.conftest import LOGIN_URL
+from utils.jwt import JWT
+
+
+async def test_get_jwks(client, es256_access_key):
+    resp = client.get(f"{LOGIN_URL}jwks.json")
+
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"].startswith("public, max-age=")
+    jwks = resp.json()
+    assert len(jwks["keys"]) == 1
+    public_jwk = jwks["keys"][0]
+    assert public_jwk["kid"] == es256_access_key.kid
+    assert "d" not in public_jwk
+
+    token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+    assert jwt.decode(token, public_jwk, algorithms=["ES256"])["sub"] == "lol@kek.com"
+
+
+async def test_get_jwks_not_modified(client, es256_access_key):
+    etag = client.get(f"{LOGIN_URL}jwks.json").headers["ETag"]
+
+    resp = client.get(f"{LOGIN_URL}jwks.json", headers={"If-None-Match": etag})
+
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+
+
+async def test_get_jwks_without_asymmetric_keys(client):
+    resp = client.get(f"{LOGIN_URL}jwks.json")
+
+    assert resp.status_code == 200
+    assert resp.json() == {"keys": []}
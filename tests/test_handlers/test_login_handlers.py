@@ -1,12 +1,17 @@
 from uuid import uuid4
 
 import pytest
+from passlib.hash import bcrypt
 
 from api.core.config import get_settings
+from api.v1.users.actions import user_claims_cache
 from tests.conftest import assert_token_lifetime
 from tests.conftest import create_test_jwt_token_for_user
 from tests.conftest import get_test_data_from_jwt_token
 from tests.conftest import LOGIN_URL
+from utils.admission import AdmissionGate
+from utils.hashing import Hasher
+from utils.hashing import pwd_context
 from utils.roles import PortalRole
 
 settings = get_settings()
@@ -59,6 +64,15 @@ async def test_user_login(client, create_user_in_database):
     )
 
 
+def _login_for_refresh_token(client, user_data: dict) -> str:
+    resp = client.post(
+        f"{LOGIN_URL}",
+        data={"username": user_data["email"], "password": user_data["password"]},
+    )
+    assert resp.status_code == 200
+    return resp.cookies["refresh_token"]
+
+
 async def test_create_access_token_by_refresh_token(client, create_user_in_database):
     user_data = {
         "user_id": uuid4(),
@@ -72,12 +86,13 @@ async def test_create_access_token_by_refresh_token(client, create_user_in_datab
         "roles": [PortalRole.ROLE_PORTAL_USER],
     }
     await create_user_in_database(user_data)
-    refresh_token = await create_test_jwt_token_for_user(user_data["email"], "refresh")
+    refresh_token = _login_for_refresh_token(client, user_data)
     resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
     assert resp.status_code == 200
 
     resp_data = resp.json()
     assert resp_data["token_type"] == "bearer"
+    assert resp.cookies["refresh_token"] != refresh_token
 
     resp_data_from_access = await get_test_data_from_jwt_token(
         resp_data["access_token"], "access"
@@ -223,3 +238,227 @@ async def test_create_access_token_by_refresh_token_error(
 
     assert resp.status_code == expected_status_code
     assert resp.json() == expected_detail
+
+
+async def test_user_login_rejected_when_login_gate_is_saturated(
+    client, create_user_in_database, monkeypatch
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    monkeypatch.setattr(
+        "api.v1.auth.services.AuthService.login_gate",
+        AdmissionGate("login", max_concurrency=0, max_queue_wait=0.01, retry_after=2),
+    )
+    resp = client.post(
+        f"{LOGIN_URL}",
+        data={"username": user_data["email"], "password": user_data["password"]},
+    )
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "2"
+    assert resp.json() == {"detail": "Service is busy, please retry later."}
+
+
+async def test_user_login_rehashes_stale_password_hash(
+    client, create_user_in_database, get_user_from_database, asyncpg_pool
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    stale_hash = bcrypt.using(rounds=4).hash(user_data["password"])
+    async with asyncpg_pool.acquire() as connection:
+        await connection.execute(
+            """UPDATE users SET hashed_password = $1 WHERE user_id = $2;""",
+            stale_hash,
+            user_data["user_id"],
+        )
+
+    resp = client.post(
+        f"{LOGIN_URL}",
+        data={"username": user_data["email"], "password": user_data["password"]},
+    )
+    assert resp.status_code == 200
+
+    user_from_db = dict((await get_user_from_database(user_data["user_id"]))[0])
+    assert user_from_db["hashed_password"] != stale_hash
+    assert not pwd_context.needs_update(user_from_db["hashed_password"])
+    assert Hasher.verify_password(user_data["password"], user_from_db["hashed_password"])
+    access_token_data = await get_test_data_from_jwt_token(
+        resp.json()["access_token"], "access"
+    )
+    assert access_token_data["ver"] == user_from_db["version"]
+
+
+async def test_logout_revokes_access_and_refresh_tokens(
+    client, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+        "roles": [PortalRole.ROLE_PORTAL_USER],
+    }
+    await create_user_in_database(user_data)
+    access_token = await create_test_jwt_token_for_user(user_data["email"], "access")
+    refresh_token = _login_for_refresh_token(client, user_data)
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    resp = client.post(
+        f"{LOGIN_URL}logout",
+        headers=headers,
+        cookies={"refresh_token": refresh_token},
+    )
+    assert resp.status_code == 204
+
+    resp = client.get(f"/v1/users/?user_id={user_data['user_id']}", headers=headers)
+    assert resp.status_code == 401
+    resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
+    assert resp.status_code == 403
+
+
+async def test_refresh_token_reuse_revokes_token_family(
+    client, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+        "roles": [PortalRole.ROLE_PORTAL_USER],
+    }
+    await create_user_in_database(user_data)
+    first_refresh_token = _login_for_refresh_token(client, user_data)
+    resp = client.post(
+        f"{LOGIN_URL}token", cookies={"refresh_token": first_refresh_token}
+    )
+    assert resp.status_code == 200
+    second_refresh_token = resp.cookies["refresh_token"]
+
+    resp = client.post(
+        f"{LOGIN_URL}token", cookies={"refresh_token": first_refresh_token}
+    )
+    assert resp.status_code == 403
+    resp = client.post(
+        f"{LOGIN_URL}token", cookies={"refresh_token": second_refresh_token}
+    )
+    assert resp.status_code == 403
+
+
+async def test_stateless_refresh_token_is_rejected(client, create_user_in_database):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    refresh_token = await create_test_jwt_token_for_user(user_data["email"], "refresh")
+    resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
+
+    assert resp.status_code == 403
+
+
+async def test_user_login_with_json_body(client, create_user_in_database):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+        "roles": [PortalRole.ROLE_PORTAL_USER],
+    }
+    await create_user_in_database(user_data)
+    resp = client.post(
+        f"{LOGIN_URL}json",
+        json={"email": user_data["email"], "password": user_data["password"]},
+    )
+    assert resp.status_code == 200
+
+    resp_data = resp.json()
+    assert resp_data["token_type"] == "bearer"
+    resp_data_from_access = await get_test_data_from_jwt_token(
+        resp_data["access_token"], "access"
+    )
+    assert resp_data_from_access["sub"] == user_data["email"]
+    assert "refresh_token" in resp.cookies
+
+
+@pytest.mark.parametrize(
+    "login_data, expected_status_code",
+    [
+        ({"email": "lol@kek.com", "password": "Abcd12!@1"}, 401),
+        ({"email": "lol1@kek.com", "password": "Abcd12!@"}, 401),
+        ({"email": "not-an-email", "password": "Abcd12!@"}, 422),
+        ({"email": "lol@kek.com"}, 422),
+    ],
+)
+async def test_user_login_with_json_body_error(
+    client, create_user_in_database, login_data, expected_status_code
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    resp = client.post(f"{LOGIN_URL}json", json=login_data)
+
+    assert resp.status_code == expected_status_code
+
+
+async def test_refresh_serves_user_claims_from_cache(
+    client, create_user_in_database, asyncpg_pool
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "password": "Abcd12!@",
+        "rating": 56,
+        "is_active": True,
+    }
+    await create_user_in_database(user_data)
+    refresh_token = _login_for_refresh_token(client, user_data)
+    resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
+    assert resp.status_code == 200
+    async with asyncpg_pool.acquire() as connection:
+        await connection.execute(
+            """UPDATE users SET rating = 10 WHERE user_id = $1;""",
+            user_data["user_id"],
+        )
+
+    refresh_token = resp.cookies["refresh_token"]
+    resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
+    payload = await get_test_data_from_jwt_token(resp.json()["access_token"], "access")
+    assert payload["rating"] == 56
+
+    user_claims_cache.clear()
+    refresh_token = resp.cookies["refresh_token"]
+    resp = client.post(f"{LOGIN_URL}token", cookies={"refresh_token": refresh_token})
+    payload = await get_test_data_from_jwt_token(resp.json()["access_token"], "access")
+    assert payload["rating"] == 10
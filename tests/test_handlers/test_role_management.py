@@ -431,6 +431,19 @@ async def test_revoke_admin_role_to_user_by_superadmin_promote_itself_error(
             409,
             {"detail": "User with email lol1kek@mail.ru has no admin privileges"},
         ),
+        (
+            {
+                "user_id": uuid4(),
+                "email": "lol1kek@mail.ru",
+                "roles": [
+                    PortalRole.ROLE_PORTAL_ADMIN,
+                    PortalRole.ROLE_PORTAL_SUPERADMIN,
+                ],
+            },
+            {"roles": [PortalRole.ROLE_PORTAL_SUPERADMIN]},
+            403,
+            {"detail": "Forbidden."},
+        ),
     ],
 )
 async def test_invalid_admin_privilege_revocation(
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils.admission import AdmissionGate
+
+
+async def test_admission_gate_admits_up_to_limit():
+    gate = AdmissionGate("test", max_concurrency=2, max_queue_wait=0.01, retry_after=1)
+
+    async with gate.admit():
+        async with gate.admit():
+            pass
+
+
+async def test_admission_gate_rejects_after_queue_wait():
+    gate = AdmissionGate("test", max_concurrency=1, max_queue_wait=0.01, retry_after=3)
+
+    async with gate.admit():
+        with pytest.raises(HTTPException) as exc_info:
+            async with gate.admit():
+                pass
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "3"}
+
+
+async def test_admission_gate_waiter_gets_released_slot():
+    gate = AdmissionGate("test", max_concurrency=1, max_queue_wait=1, retry_after=1)
+    order = []
+
+    async def holder():
+        async with gate.admit():
+            order.append("holder")
+            await asyncio.sleep(0.01)
+
+    async def waiter():
+        await asyncio.sleep(0)
+        async with gate.admit():
+            order.append("waiter")
+
+    await asyncio.gather(holder(), waiter())
+
+    assert order == ["holder", "waiter"]
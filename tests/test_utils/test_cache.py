@@ -0,0 +1,37 @@
+import time
+
+from utils.cache import ExpiringLRUCache
+
+
+def test_cache_hit_and_miss_counters():
+    cache = ExpiringLRUCache("test", max_entries=10)
+    cache.set("key", "value", expires_at=time.time() + 60)
+
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = ExpiringLRUCache("test", max_entries=2)
+    expires_at = time.time() + 60
+    cache.set("a", 1, expires_at)
+    cache.set("b", 2, expires_at)
+    cache.get("a")
+    cache.set("c", 3, expires_at)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_drops_expired_entries():
+    cache = ExpiringLRUCache("test", max_entries=2)
+    cache.set("expired", 1, expires_at=time.time() - 1)
+    cache.set("expiring", 2, expires_at=time.time() + 0.01)
+    time.sleep(0.02)
+
+    assert cache.get("expired") is None
+    assert cache.get("expiring") is None
+    assert len(cache) == 0
@@ -0,0 +1,36 @@
+import uuid
+
+from utils.claims import compact_claims
+from utils.claims import decode_user_id
+from utils.claims import encode_user_id
+from utils.claims import expand_claims
+from utils.roles import PortalRole
+
+
+def test_compact_claims_round_trip():
+    claims = {
+        "sub": "lol@kek.com",
+        "user_id": str(uuid.uuid4()),
+        "roles": [PortalRole.ROLE_PORTAL_USER, PortalRole.ROLE_PORTAL_ADMIN],
+        "rating": 56,
+        "count_of_borrowed_books": 5,
+        "exp": 4102444800,
+    }
+    compact = compact_claims(claims)
+
+    assert compact["rl"] == 3
+    assert len(compact["uid"]) == 22
+    assert "roles" not in compact
+    assert expand_claims(compact) == claims
+
+
+def test_expand_claims_keeps_verbose_payload():
+    claims = {"sub": "lol@kek.com", "roles": [PortalRole.ROLE_PORTAL_USER]}
+
+    assert expand_claims(claims) is claims
+
+
+def test_user_id_encoding():
+    user_id = uuid.uuid4()
+
+    assert decode_user_id(encode_user_id(user_id)) == str(user_id)
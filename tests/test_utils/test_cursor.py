@@ -0,0 +1,30 @@
+from utils import cursor
+from utils.cursor import TrailingCursor
+
+
+def test_position_trails_last_id_by_lookback(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cursor.time, "monotonic", lambda: now[0])
+    trailing_cursor = TrailingCursor(lookback=30)
+
+    trailing_cursor.advance(10)
+    now[0] += 20
+    trailing_cursor.advance(25)
+
+    assert trailing_cursor.last_id == 25
+    assert trailing_cursor.position == 0
+    now[0] += 10
+    assert trailing_cursor.position == 10
+    now[0] += 20
+    assert trailing_cursor.position == 25
+
+
+def test_position_never_moves_back(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cursor.time, "monotonic", lambda: now[0])
+    trailing_cursor = TrailingCursor(lookback=0, start=40)
+
+    trailing_cursor.advance(0)
+
+    assert trailing_cursor.last_id == 40
+    assert trailing_cursor.position == 40
@@ -0,0 +1,74 @@
+import asyncio
+
+from passlib.hash import bcrypt
+
+from api.core.config import get_settings
+from api.core.metrics import HASHING_QUEUE_WAIT_SECONDS
+from utils.hashing import apply_bcrypt_rounds
+from utils.hashing import calibrate_bcrypt_rounds
+from utils.hashing import Hasher
+from utils.hashing import pwd_context
+
+settings = get_settings()
+
+
+def _observed_waits() -> float:
+    for metric in HASHING_QUEUE_WAIT_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                return sample.value
+    return 0
+
+
+async def test_async_hash_and_verify():
+    hashed_password = await Hasher.get_password_hash_async("Abcd12!@")
+
+    assert await Hasher.verify_password_async("Abcd12!@", hashed_password)
+    assert not await Hasher.verify_password_async("Abcd12!@1", hashed_password)
+    assert Hasher.verify_password("Abcd12!@", hashed_password)
+
+
+async def test_hashing_does_not_block_event_loop():
+    waits_before = _observed_waits()
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.gather(
+        *(Hasher.get_password_hash_async("Abcd12!@") for _ in range(4))
+    )
+    ticker_task.cancel()
+
+    assert ticks > 1
+    assert _observed_waits() - waits_before == 4
+
+
+def test_calibrate_bcrypt_rounds_respects_security_floor():
+    assert calibrate_bcrypt_rounds(target_ms=0, min_rounds=5, max_rounds=8) == 5
+
+
+def test_calibrate_bcrypt_rounds_respects_max_rounds():
+    assert calibrate_bcrypt_rounds(target_ms=10_000, min_rounds=4, max_rounds=6) == 6
+
+
+def test_apply_bcrypt_rounds():
+    original_rounds = settings.BCRYPT_ROUNDS
+    try:
+        assert apply_bcrypt_rounds(settings.BCRYPT_MIN_ROUNDS + 1) == (
+            settings.BCRYPT_MIN_ROUNDS + 1
+        )
+        assert settings.BCRYPT_ROUNDS == settings.BCRYPT_MIN_ROUNDS + 1
+        hashed_password = Hasher.get_password_hash("Abcd12!@")
+        assert bcrypt.from_string(hashed_password).rounds == (
+            settings.BCRYPT_MIN_ROUNDS + 1
+        )
+
+        assert apply_bcrypt_rounds(1) == settings.BCRYPT_MIN_ROUNDS
+        assert pwd_context.needs_update(hashed_password)
+    finally:
+        apply_bcrypt_rounds(original_rounds)
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from api.core.metrics import DB_HEDGED_READS
+from api.core.metrics import DB_HEDGED_READS_WON
+from utils.hedging import HedgedReader
+
+
+def _reader(latencies: dict, cancelled: list | None = None) -> HedgedReader:
+    async def fetch(replica, statement):
+        try:
+            await asyncio.sleep(latencies[replica])
+        except asyncio.CancelledError:
+            cancelled.append(replica)
+            raise
+        if isinstance(statement, Exception):
+            raise statement
+        return replica
+
+    return HedgedReader(fetch, percentile=95, min_delay=0.01, initial_delay=0.01)
+
+
+async def test_fast_read_is_not_hedged():
+    reader = _reader({"a": 0, "b": 0})
+    hedged = DB_HEDGED_READS._value.get()
+
+    assert await reader.read("query", ["a", "b"]) in {"a", "b"}
+    assert DB_HEDGED_READS._value.get() == hedged
+
+
+async def test_slow_read_is_hedged_and_loser_cancelled():
+    cancelled = []
+    reader = _reader({"slow": 1, "fast": 0}, cancelled)
+    hedged = DB_HEDGED_READS._value.get()
+    won = DB_HEDGED_READS_WON._value.get()
+
+    results = [await reader.read("query", ["slow", "fast"]) for _ in range(4)]
+    await asyncio.sleep(0)
+
+    assert results == ["fast"] * 4
+    assert len(cancelled) == DB_HEDGED_READS._value.get() - hedged
+    assert set(cancelled) <= {"slow"}
+    assert DB_HEDGED_READS_WON._value.get() - won == len(cancelled)
+
+
+async def test_failed_read_raises():
+    reader = _reader({"a": 0, "b": 0})
+
+    with pytest.raises(ValueError):
+        await reader.read(ValueError("replica down"), ["a", "b"])
+
+
+def test_delay_follows_latency_percentile():
+    reader = HedgedReader(None, percentile=90, min_delay=0.001, window=100)
+
+    for latency in range(1, 101):
+        reader.observe(latency / 1000)
+
+    assert reader.delay == pytest.approx(0.091)
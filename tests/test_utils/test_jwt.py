@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from api.core.config import get_settings
+from utils.jwt import decoded_access_token_cache
+from utils.jwt import JWT
+
+settings = get_settings()
+
+
+async def test_decoded_access_token_is_served_from_cache():
+    token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+    hits_before = decoded_access_token_cache.hits
+
+    first_payload = await JWT.decode_jwt_token(token, "access")
+    first_payload["sub"] = "mutated@kek.com"
+    second_payload = await JWT.decode_jwt_token(token, "access")
+
+    assert decoded_access_token_cache.hits == hits_before + 1
+    assert second_payload["sub"] == "lol@kek.com"
+
+
+async def test_invalid_access_token_is_not_cached():
+    token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+    entries_before = len(decoded_access_token_cache)
+
+    with pytest.raises(HTTPException):
+        await JWT.decode_jwt_token(token + "a", "access")
+
+    assert len(decoded_access_token_cache) == entries_before
+
+
+async def test_es256_access_token_has_kid_and_verifies_with_public_jwk(
+    es256_access_key,
+):
+    token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "ES256"
+    assert header["kid"] == es256_access_key.kid
+
+    payload = jwt.decode(token, es256_access_key.public_jwk, algorithms=["ES256"])
+    assert payload["sub"] == "lol@kek.com"
+    assert (await JWT.decode_jwt_token(token, "access"))["sub"] == "lol@kek.com"
+
+
+async def test_access_token_with_unknown_kid_is_rejected(es256_access_key):
+    token = jwt.encode(
+        {"sub": "lol@kek.com"},
+        es256_access_key.signing_key,
+        algorithm="ES256",
+        headers={"kid": "unknown"},
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await JWT.decode_jwt_token(token, "access")
+    assert exc_info.value.status_code == 401
+
+
+def _write_keyring(path, access_keys, current):
+    refresh_keys = [{"kid": "refresh-1", "alg": "HS256", "secret": "refresh"}]
+    path.write_text(
+        json.dumps(
+            {
+                "access": {"current": current, "keys": access_keys},
+                "refresh": {"current": "refresh-1", "keys": refresh_keys},
+            }
+        )
+    )
+    # Make sure the reload sees a new modification time.
+    os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+
+@pytest.fixture
+def keyring_path(tmp_path, monkeypatch):
+    keyring_path = tmp_path / "keyring.json"
+    monkeypatch.setattr(settings, "JWT_KEYRING_PATH", str(keyring_path))
+    monkeypatch.setattr(settings, "JWT_KEYRING_RELOAD_INTERVAL_SECONDS", 0)
+    yield keyring_path
+    monkeypatch.undo()
+    JWT.load_keys()
+
+
+async def test_key_ring_rotation_keeps_old_tokens_valid(keyring_path):
+    old_key = {"kid": "access-1", "alg": "HS256", "secret": "old-secret"}
+    new_key = {"kid": "access-2", "alg": "HS256", "secret": "new-secret"}
+    _write_keyring(keyring_path, [old_key], current="access-1")
+    JWT.load_keys()
+    old_token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+
+    _write_keyring(keyring_path, [new_key, old_key], current="access-2")
+    new_token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+
+    assert jwt.get_unverified_header(old_token)["kid"] == "access-1"
+    assert jwt.get_unverified_header(new_token)["kid"] == "access-2"
+    assert (await JWT.decode_jwt_token(old_token, "access"))["sub"] == "lol@kek.com"
+    assert (await JWT.decode_jwt_token(new_token, "access"))["sub"] == "lol@kek.com"
+
+    _write_keyring(keyring_path, [new_key], current="access-2")
+    with pytest.raises(HTTPException):
+        await JWT.decode_jwt_token(old_token, "access")
+    assert (await JWT.decode_jwt_token(new_token, "access"))["sub"] == "lol@kek.com"
+
+
+async def test_broken_key_ring_file_keeps_previous_keys(keyring_path):
+    key = {"kid": "access-1", "alg": "HS256", "secret": "secret"}
+    _write_keyring(keyring_path, [key], current="access-1")
+    JWT.load_keys()
+    token = await JWT.create_jwt_token({"sub": "lol@kek.com"}, "access")
+
+    keyring_path.write_text("{not json")
+    os.utime(keyring_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+
+    assert (await JWT.decode_jwt_token(token, "access"))["sub"] == "lol@kek.com"
+    assert JWT.keys["access"].current.kid == "access-1"
@@ -0,0 +1,67 @@
+import datetime
+import time
+from uuid import uuid4
+
+from db.models import RevokedToken
+from utils.revocation import BloomFilter
+from utils.revocation import RevocationList
+
+
+def _revocation(**kwargs) -> RevokedToken:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    kwargs.setdefault("revoked_at", now)
+    kwargs.setdefault("expires_at", now + datetime.timedelta(minutes=30))
+    return RevokedToken(**kwargs)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [str(uuid4()) for _ in range(1000)]
+    for key in keys:
+        bloom_filter.add(key)
+
+    assert all(bloom_filter.might_contain(key) for key in keys)
+    false_positives = sum(
+        bloom_filter.might_contain(str(uuid4())) for _ in range(10000)
+    )
+    assert false_positives < 300
+
+
+def test_revoked_jti_is_rejected():
+    revocation_list = RevocationList(100, 0.01, refresh_interval=60)
+    revocation_list.add(_revocation(jti="revoked"))
+
+    assert revocation_list.is_revoked({"jti": "revoked"})
+    assert not revocation_list.is_revoked({"jti": "other"})
+
+
+def test_user_revocation_rejects_only_tokens_issued_before_it():
+    revocation_list = RevocationList(100, 0.01, refresh_interval=60)
+    user_id = uuid4()
+    revocation_list.add(_revocation(user_id=user_id))
+
+    assert revocation_list.is_revoked({"iat": int(time.time()) - 60}, user_id)
+    assert revocation_list.is_revoked({"user_id": str(user_id)})
+    assert not revocation_list.is_revoked({"iat": int(time.time()) + 60}, user_id)
+    assert not revocation_list.is_revoked({"iat": 0}, uuid4())
+
+
+def test_revocation_list_grows_past_filter_capacity():
+    revocation_list = RevocationList(2, 0.01, refresh_interval=60)
+    jtis = [str(uuid4()) for _ in range(10)]
+    for jti in jtis:
+        revocation_list.add(_revocation(jti=jti))
+
+    assert len(revocation_list) == 10
+    assert all(revocation_list.is_revoked({"jti": jti}) for jti in jtis)
+
+
+def test_adding_a_revocation_again_is_a_no_op():
+    revocation_list = RevocationList(100, 0.01, refresh_interval=60)
+    revocation = _revocation(jti="revoked", user_id=uuid4())
+
+    revocation_list.add(revocation)
+    revocation_list.add(revocation)
+
+    assert len(revocation_list) == 2
+    assert revocation_list._filter.count == 2
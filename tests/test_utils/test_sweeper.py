@@ -0,0 +1,38 @@
+import datetime
+import uuid
+
+from utils.sweeper import sweep_expired_refresh_tokens
+
+
+async def test_sweep_deletes_expired_refresh_tokens_in_batches(
+    async_session_test, asyncpg_pool
+):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    expired_jtis = [f"expired{number}" for number in range(5)]
+    live_jtis = [f"live{number}" for number in range(2)]
+    async with asyncpg_pool.acquire() as connection:
+        await connection.executemany(
+            """INSERT INTO refresh_tokens (jti, family_id, user_id, expires_at)
+            VALUES ($1, $2, $3, $4)""",
+            [
+                (jti, uuid.uuid4(), uuid.uuid4(), now - datetime.timedelta(minutes=1))
+                for jti in expired_jtis
+            ]
+            + [
+                (jti, uuid.uuid4(), uuid.uuid4(), now + datetime.timedelta(days=1))
+                for jti in live_jtis
+            ],
+        )
+    transactions = []
+
+    def session_factory():
+        transactions.append(None)
+        return async_session_test()
+
+    deleted = await sweep_expired_refresh_tokens(session_factory, batch_size=2)
+
+    assert deleted == 5
+    assert len(transactions) == 3
+    async with asyncpg_pool.acquire() as connection:
+        rows = await connection.fetch("""SELECT jti FROM refresh_tokens;""")
+    assert sorted(row["jti"] for row in rows) == live_jtis
@@ -0,0 +1,27 @@
+from uuid import uuid4
+
+from utils.user_versions import UserVersionMap
+
+
+def test_unknown_user_is_not_stale():
+    user_versions = UserVersionMap(refresh_interval=60)
+
+    assert not user_versions.is_stale(uuid4(), 1)
+
+
+def test_older_version_is_stale():
+    user_versions = UserVersionMap(refresh_interval=60)
+    user_id = uuid4()
+    user_versions._versions[user_id] = 5
+
+    assert user_versions.is_stale(str(user_id), 4)
+    assert user_versions.is_stale(user_id, None)
+    assert not user_versions.is_stale(user_id, 5)
+
+
+def test_unknown_user_token_from_before_the_map_is_complete_is_stale():
+    user_versions = UserVersionMap(refresh_interval=60)
+    user_versions._complete_since = 1000.0
+
+    assert user_versions.is_stale(uuid4(), 1, issued_at=999)
+    assert not user_versions.is_stale(uuid4(), 1, issued_at=1000)
@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextlib import suppress
+
+import pytest
+from fastapi import HTTPException
+
+from utils.write_behind import WriteBehindBuffer
+
+
+class FakeSession:
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def _buffer(applied: list, max_entries: int = 10, max_pending: int = 100):
+    async def apply(session, batch):
+        applied.append(batch)
+        return len(batch)
+
+    return WriteBehindBuffer(
+        name="test",
+        session_factory=FakeSession,
+        apply=apply,
+        max_entries=max_entries,
+        max_pending=max_pending,
+        flush_interval=60,
+    )
+
+
+async def test_writes_to_same_key_are_coalesced():
+    applied = []
+    buffer = _buffer(applied)
+
+    buffer.put("user", {"rating": 70})
+    buffer.put("user", {"rating": 60, "count": 2})
+    buffer.put("other", {"rating": 50})
+    await buffer.flush()
+
+    assert applied == [{"user": {"rating": 60, "count": 2}, "other": {"rating": 50}}]
+    assert len(buffer) == 0
+
+
+async def test_full_buffer_is_flushed_by_background_flusher():
+    applied = []
+    buffer = _buffer(applied, max_entries=2)
+    flusher = asyncio.create_task(buffer.run())
+    try:
+        buffer.put("first", {"rating": 1})
+        await asyncio.sleep(0.01)
+        assert applied == []
+        buffer.put("second", {"rating": 2})
+        assert applied == []
+        await asyncio.sleep(0.01)
+    finally:
+        flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await flusher
+
+    assert applied == [{"first": {"rating": 1}, "second": {"rating": 2}}]
+
+
+async def test_writes_of_new_keys_are_refused_at_the_cap():
+    buffer = _buffer([], max_entries=1, max_pending=2)
+    buffer.put("first", {"rating": 1})
+    buffer.put("second", {"rating": 2})
+
+    with pytest.raises(HTTPException) as exc_info:
+        buffer.put("third", {"rating": 3})
+    buffer.put("first", {"rating": 4})
+
+    assert exc_info.value.status_code == 503
+    assert len(buffer) == 2
+
+
+async def test_failed_flush_keeps_writes_without_overriding_newer_ones():
+    async def apply(session, batch):
+        buffer.put("user", {"rating": 60})
+        raise RuntimeError("database is down")
+
+    buffer = WriteBehindBuffer(
+        name="test",
+        session_factory=FakeSession,
+        apply=apply,
+        max_entries=10,
+        max_pending=100,
+        flush_interval=1,
+    )
+    buffer.put("user", {"rating": 70, "count": 1})
+
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+
+    assert len(buffer) == 1
+    assert buffer._pending["user"] == {"rating": 60, "count": 1}
@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from api.core.exceptions import AppExceptions
+from api.core.metrics import ADMISSION_IN_FLIGHT
+from api.core.metrics import ADMISSION_REJECTED
+
+
+class AdmissionGate:
+    """Bounded concurrency gate that sheds load instead of queueing unboundedly.
+
+    At most ``max_concurrency`` callers run inside the gate. Others wait up to
+    ``max_queue_wait`` seconds for a slot and are then rejected with 503 and a
+    Retry-After header, so accepted work finishes within its latency budget.
+    """
+
+    def __init__(
+        self, name: str, max_concurrency: int, max_queue_wait: float, retry_after: int
+    ):
+        self.name = name
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._semaphore.locked():
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), timeout=self.max_queue_wait
+                )
+            except asyncio.TimeoutError:
+                ADMISSION_REJECTED.labels(self.name).inc()
+                AppExceptions.service_unavailable_exception(
+                    "Service is busy, please retry later.",
+                    retry_after=self.retry_after,
+                )
+        else:
+            await self._semaphore.acquire()
+
+        ADMISSION_IN_FLIGHT.labels(self.name).inc()
+        try:
+            yield
+        finally:
+            ADMISSION_IN_FLIGHT.labels(self.name).dec()
+            self._semaphore.release()
@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Hashable
+
+from api.core.metrics import CACHE_HITS
+from api.core.metrics import CACHE_MISSES
+
+
+class ExpiringLRUCache:
+    """Bounded LRU cache where every entry expires at its own deadline.
+
+    Memory is capped by ``max_entries``: the least recently used entry is
+    evicted when the cache is full. Expired entries are dropped on access.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_HITS.labels(self.name).inc()
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        CACHE_MISSES.labels(self.name).inc()
+        return None
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,65 @@
+import base64
+import uuid
+
+from utils.roles import PortalRole
+
+# Abbreviated names of the custom access token claims in the compact profile.
+COMPACT_CLAIM_NAMES = {
+    "user_id": "uid",
+    "roles": "rl",
+    "rating": "rt",
+    "count_of_borrowed_books": "cb",
+}
+EXPANDED_CLAIM_NAMES = {short: name for name, short in COMPACT_CLAIM_NAMES.items()}
+
+# Bit of each role in the "rl" bitmask. Never renumber existing roles.
+ROLE_BITS = {
+    PortalRole.ROLE_PORTAL_USER: 1,
+    PortalRole.ROLE_PORTAL_ADMIN: 2,
+    PortalRole.ROLE_PORTAL_SUPERADMIN: 4,
+}
+
+
+def encode_user_id(user_id: str | uuid.UUID) -> str:
+    """22 character base64url form of a UUID"""
+    raw = uuid.UUID(str(user_id)).bytes
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_user_id(encoded: str) -> str:
+    return str(uuid.UUID(bytes=base64.urlsafe_b64decode(encoded + "==")))
+
+
+def encode_roles(roles: list[str]) -> int:
+    return sum(ROLE_BITS[PortalRole(role)] for role in set(roles))
+
+
+def decode_roles(bitmask: int) -> list[str]:
+    return [str(role) for role, bit in ROLE_BITS.items() if bitmask & bit]
+
+
+def compact_claims(payload: dict) -> dict:
+    """Shorten claim names and values of an access token payload"""
+    compact = {}
+    for name, value in payload.items():
+        if name == "user_id":
+            value = encode_user_id(value)
+        elif name == "roles":
+            value = encode_roles(value)
+        compact[COMPACT_CLAIM_NAMES.get(name, name)] = value
+    return compact
+
+
+def expand_claims(payload: dict) -> dict:
+    """Map a compact payload back onto the verbose shape; verbose ones pass as is"""
+    if not EXPANDED_CLAIM_NAMES.keys() & payload.keys():
+        return payload
+    expanded = {}
+    for name, value in payload.items():
+        name = EXPANDED_CLAIM_NAMES.get(name, name)
+        if name == "user_id":
+            value = decode_user_id(value)
+        elif name == "roles":
+            value = decode_roles(value)
+        expanded[name] = value
+    return expanded
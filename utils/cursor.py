@@ -0,0 +1,33 @@
+import time
+from collections import deque
+
+
+class TrailingCursor:
+    """Incremental read position over ids allocated from a sequence.
+
+    Sequence values are taken before the transaction commits, so a row with a
+    lower id can become visible after one with a higher id. Reading from the
+    highest id seen ``lookback`` seconds ago, rather than the highest seen so
+    far, still picks such a row up if its transaction commits within
+    ``lookback`` seconds. Rows may then be read more than once, so readers
+    must apply them idempotently.
+    """
+
+    def __init__(self, lookback: float, start: int = 0):
+        self.lookback = lookback
+        self._marks: deque[tuple[float, int]] = deque([(time.monotonic(), start)])
+
+    @property
+    def last_id(self) -> int:
+        return self._marks[-1][1]
+
+    @property
+    def position(self) -> int:
+        """Read rows with ids above this one"""
+        horizon = time.monotonic() - self.lookback
+        while len(self._marks) > 1 and self._marks[1][0] <= horizon:
+            self._marks.popleft()
+        return self._marks[0][1]
+
+    def advance(self, last_id: int) -> None:
+        self._marks.append((time.monotonic(), max(self.last_id, last_id)))
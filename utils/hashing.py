@@ -1,6 +1,98 @@
+import asyncio
+import hashlib
+import hmac
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
+
+from api.core.config import get_settings
+from api.core.metrics import HASHING_QUEUE_DEPTH
+from api.core.metrics import HASHING_QUEUE_WAIT_SECONDS
+
+settings = get_settings()
+
+
+def _bcrypt_options(rounds: int) -> dict:
+    rounds = max(rounds, settings.BCRYPT_MIN_ROUNDS)
+    return {
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+        "bcrypt__max_rounds": rounds,
+    }
+
+
+def _build_pwd_context() -> CryptContext:
+    """Build the password context from settings.
+
+    The first scheme hashes new passwords, the rest are only verified and
+    marked deprecated. Pinning bcrypt min/max rounds to the configured value
+    makes hashes with any other cost report ``needs_update``, so they get
+    rehashed on the next successful login.
+    """
+    options = {}
+    if "bcrypt" in settings.PASSWORD_HASH_SCHEMES:
+        options.update(_bcrypt_options(settings.BCRYPT_ROUNDS))
+    return CryptContext(
+        schemes=settings.PASSWORD_HASH_SCHEMES, deprecated="auto", **options
+    )
+
+
+pwd_context = _build_pwd_context()
+
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    """Median time in milliseconds to hash a password with given bcrypt cost"""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int, samples: int = 3
+) -> int:
+    """Pick the highest bcrypt cost that hashes within target_ms on this host.
+
+    Never goes below min_rounds, even if the host is too slow for the target.
+    """
+    rounds = min_rounds
+    while rounds < max_rounds and measure_bcrypt_ms(rounds + 1, samples) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def apply_bcrypt_rounds(rounds: int) -> int:
+    """Switch new hashes to given bcrypt cost and record it in settings"""
+    settings.BCRYPT_ROUNDS = max(rounds, settings.BCRYPT_MIN_ROUNDS)
+    if "bcrypt" in settings.PASSWORD_HASH_SCHEMES:
+        pwd_context.update(**_bcrypt_options(settings.BCRYPT_ROUNDS))
+    return settings.BCRYPT_ROUNDS
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt releases the GIL, so a small pool gives real parallelism
+# while keeping the event loop free during hashing.
+hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.HASHING_THREAD_POOL_SIZE, thread_name_prefix="hasher"
+)
+HASHING_QUEUE_DEPTH.set_function(lambda: hashing_executor._work_queue.qsize())
+
+
+async def _run_in_hashing_pool(func, *args):
+    """Run a CPU-bound hashing call in the hashing pool and record queue wait"""
+    submitted_at = time.perf_counter()
+
+    def job():
+        HASHING_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted_at)
+        return func(*args)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor, job)
 
 
 class Hasher:
@@ -11,3 +103,47 @@ class Hasher:
     @staticmethod
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
+
+    @staticmethod
+    def verify_and_update(
+        plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """Verify password and return a new hash if the stored one is stale"""
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await _run_in_hashing_pool(
+            Hasher.verify_password, plain_password, hashed_password
+        )
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        return await _run_in_hashing_pool(Hasher.get_password_hash, password)
+
+    @staticmethod
+    async def verify_and_update_async(
+        plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await _run_in_hashing_pool(
+            Hasher.verify_and_update, plain_password, hashed_password
+        )
+
+    @staticmethod
+    def get_client_secret_digest(client_secret: str) -> str:
+        """Keyed HMAC of a service client secret.
+
+        Client secrets are long random strings, so a fast keyed digest is as
+        safe as bcrypt for them and costs microseconds instead of a hashing slot.
+        """
+        return hmac.new(
+            settings.SERVICE_CLIENT_SECRET_KEY.encode(),
+            client_secret.encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
+    @staticmethod
+    def verify_client_secret(client_secret: str, secret_digest: str) -> bool:
+        return hmac.compare_digest(
+            Hasher.get_client_secret_digest(client_secret), secret_digest
+        )
@@ -0,0 +1,74 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Sequence
+
+from api.core.metrics import DB_HEDGED_READS
+from api.core.metrics import DB_HEDGED_READS_WON
+
+
+class HedgedReader:
+    """Runs a read on one replica and repeats it on another if it is slow.
+
+    A read that has not finished after the hedge delay is sent to a second
+    replica as well; the first answer wins and the other read is cancelled.
+    The delay is the given percentile of recent read latencies, so only the
+    slowest reads are hedged and the extra load stays small.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any, Any], Awaitable[Any]],
+        percentile: float,
+        min_delay: float,
+        initial_delay: float = 0.05,
+        window: int = 1000,
+    ):
+        self.fetch = fetch
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.delay = initial_delay
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._recompute_every = max(window // 10, 1)
+        self._observed = 0
+
+    def observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._observed += 1
+        if self._observed % self._recompute_every == 0:
+            latencies = sorted(self._latencies)
+            index = int(len(latencies) * self.percentile / 100)
+            self.delay = max(latencies[min(index, len(latencies) - 1)], self.min_delay)
+
+    async def read(self, statement: Any, replicas: Sequence[Any]) -> Any:
+        first, second = random.sample(list(replicas), 2)
+        started = time.perf_counter()
+        first_read = asyncio.create_task(self.fetch(first, statement))
+        pending = {first_read}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.delay)
+            if done:
+                result = first_read.result()
+                self.observe(time.perf_counter() - started)
+                return result
+            DB_HEDGED_READS.inc()
+            pending.add(asyncio.create_task(self.fetch(second, statement)))
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first_read:
+                            DB_HEDGED_READS_WON.inc()
+                        self.observe(time.perf_counter() - started)
+                        return task.result()
+            # Every read failed; report the error of the first one.
+            return first_read.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,44 +1,261 @@
+import base64
 import datetime
+import hashlib
+import json
+import os
+import time
+import uuid
 
+from jose import jwk
 from jose import jwt
 from jose import JWTError
+from jose.exceptions import JOSEError
 
 from api.core.config import get_settings
 from api.core.exceptions import AppExceptions
+from api.core.logging.logging_app import logger
+from utils.cache import ExpiringLRUCache
+from utils.claims import expand_claims
 
 settings = get_settings()
 
+ASYMMETRIC_ALGORITHM_PREFIXES = ("ES", "RS", "PS")
+# Members used for RFC 7638 JWK thumbprints, which serve as default key ids.
+THUMBPRINT_MEMBERS = {"EC": ("crv", "kty", "x", "y"), "RSA": ("e", "kty", "n")}
+
+# Verified access token payloads keyed by token digest, kept until token "exp".
+decoded_access_token_cache = ExpiringLRUCache(
+    name="access_token", max_entries=settings.ACCESS_TOKEN_CACHE_MAX_ENTRIES
+)
+
+
+class JWTKey:
+    """Key material used to sign and verify one type of token"""
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key,
+        verification_key,
+        kid: str | None = None,
+        public_jwk: dict | None = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verification_key = verification_key
+        self.kid = kid
+        self.public_jwk = public_jwk
+
+    @classmethod
+    def symmetric(cls, algorithm: str, secret: str, kid: str | None = None) -> "JWTKey":
+        if kid is None:
+            digest = hashlib.sha256(b"kid:" + secret.encode()).digest()
+            kid = base64.urlsafe_b64encode(digest[:12]).decode()
+        return cls(algorithm, signing_key=secret, verification_key=secret, kid=kid)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "JWTKey":
+        """Build a key from a key ring file entry"""
+        if "secret" in config:
+            return cls.symmetric(config["alg"], config["secret"], config.get("kid"))
+        private_pem = config.get("private_key")
+        if private_pem is None:
+            with open(config["private_key_path"]) as private_key_file:
+                private_pem = private_key_file.read()
+        return cls.from_private_pem(config["alg"], private_pem, config.get("kid"))
+
+    @classmethod
+    def from_private_pem(
+        cls, algorithm: str, private_pem: str, kid: str | None = None
+    ) -> "JWTKey":
+        public_key = jwk.construct(private_pem, algorithm).public_key()
+        public_jwk = {
+            name: value
+            for name, value in public_key.to_dict().items()
+            if name in ("kty", "crv", "x", "y", "n", "e")
+        }
+        kid = kid or _jwk_thumbprint(public_jwk)
+        public_jwk.update({"kid": kid, "alg": algorithm, "use": "sig"})
+        return cls(
+            algorithm,
+            signing_key=private_pem,
+            verification_key=public_key.to_pem().decode(),
+            kid=kid,
+            public_jwk=public_jwk,
+        )
+
+
+def _jwk_thumbprint(public_jwk: dict) -> str:
+    members = THUMBPRINT_MEMBERS[public_jwk["kty"]]
+    canonical = json.dumps(
+        {name: public_jwk[name] for name in members},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeyRing:
+    """Keys of one token type indexed by kid.
+
+    The current key signs new tokens. Retiring keys only verify tokens that
+    were signed before a rotation, until those tokens expire.
+    """
+
+    def __init__(self, current: JWTKey, retiring: list[JWTKey] | None = None):
+        self.current = current
+        self.by_kid = {key.kid: key for key in [*(retiring or []), current]}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "KeyRing":
+        keys = [JWTKey.from_config(key_config) for key_config in config["keys"]]
+        current_kid = config.get("current", keys[0].kid)
+        current = next(key for key in keys if key.kid == current_kid)
+        return cls(current, [key for key in keys if key is not current])
+
+    def verification_keys(self, kid: str | None) -> list[JWTKey]:
+        if kid is None:
+            # Tokens issued before key ids were introduced.
+            return list(self.by_kid.values())
+        key = self.by_kid.get(kid)
+        return [key] if key is not None else []
+
+
+def _load_access_key() -> JWTKey:
+    if not settings.ALGORITHM.startswith(ASYMMETRIC_ALGORITHM_PREFIXES):
+        return JWTKey.symmetric(settings.ALGORITHM, settings.SECRET_KEY_FOR_ACCESS)
+    with open(settings.ACCESS_TOKEN_PRIVATE_KEY_PATH) as private_key_file:
+        private_pem = private_key_file.read()
+    return JWTKey.from_private_pem(
+        settings.ALGORITHM, private_pem, kid=settings.ACCESS_TOKEN_KEY_ID or None
+    )
+
+
+def _load_key_rings() -> tuple[dict[str, KeyRing], int | None]:
+    if not settings.JWT_KEYRING_PATH:
+        refresh_key = JWTKey.symmetric(
+            settings.REFRESH_TOKEN_ALGORITHM, settings.SECRET_KEY_FOR_REFRESH
+        )
+        return {
+            "access": KeyRing(_load_access_key()),
+            "refresh": KeyRing(refresh_key),
+        }, None
+    keyring_mtime = os.stat(settings.JWT_KEYRING_PATH).st_mtime_ns
+    with open(settings.JWT_KEYRING_PATH) as keyring_file:
+        config = json.load(keyring_file)
+    return {
+        token_type: KeyRing.from_config(config[token_type])
+        for token_type in ("access", "refresh")
+    }, keyring_mtime
+
 
 class JWT:
+    keys: dict[str, KeyRing] = {}
+    _jwks: tuple[bytes, str] | None = None
+    _keyring_mtime: int | None = None
+    _next_keyring_check: float = 0
+
+    @staticmethod
+    def load_keys() -> None:
+        """(Re)load key rings from JWT_KEYRING_PATH or from single-key settings"""
+        JWT.keys, JWT._keyring_mtime = _load_key_rings()
+        JWT._jwks = None
+        decoded_access_token_cache.clear()
+
+    @staticmethod
+    def reload_keys_if_changed() -> None:
+        """Pick up key ring file changes without restarting workers.
+
+        Rotation without downtime: add the new key to the ring, make it current
+        once every worker has it, and drop the old key after the longest token
+        lifetime has passed. A broken file keeps the previous ring in place.
+        """
+        if not settings.JWT_KEYRING_PATH or time.monotonic() < JWT._next_keyring_check:
+            return
+        JWT._next_keyring_check = (
+            time.monotonic() + settings.JWT_KEYRING_RELOAD_INTERVAL_SECONDS
+        )
+        try:
+            if os.stat(settings.JWT_KEYRING_PATH).st_mtime_ns != JWT._keyring_mtime:
+                JWT.load_keys()
+                logger.info("JWT key ring reloaded")
+        except (OSError, ValueError, KeyError, StopIteration, JOSEError) as err:
+            logger.error(f"Could not reload JWT key ring: {err}")
+
+    @staticmethod
+    def get_jwks() -> tuple[bytes, str]:
+        """Serialized JWKS document with public access token keys and its ETag"""
+        JWT.reload_keys_if_changed()
+        if JWT._jwks is None:
+            public_keys = [
+                key.public_jwk
+                for key in JWT.keys["access"].by_kid.values()
+                if key.public_jwk
+            ]
+            body = json.dumps({"keys": public_keys}, sort_keys=True).encode()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            JWT._jwks = (body, etag)
+        return JWT._jwks
 
     @staticmethod
     async def create_jwt_token(
         data: dict, token_type: str, expires_delta: datetime.timedelta | None = None
     ) -> str:
+        JWT.reload_keys_if_changed()
         if token_type == "access":
-            token_key = settings.SECRET_KEY_FOR_ACCESS
+            token_key = JWT.keys["access"].current
             token_time = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         else:
-            token_key = settings.SECRET_KEY_FOR_REFRESH
+            token_key = JWT.keys["refresh"].current
             token_time = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60
 
-        to_encode = data.copy()
-        expire = datetime.datetime.now(datetime.timezone.utc) + (
-            expires_delta or datetime.timedelta(minutes=token_time)
+        to_encode = {"jti": uuid.uuid4().hex, **data}
+        issued_at = datetime.datetime.now(datetime.timezone.utc)
+        expire = issued_at + (expires_delta or datetime.timedelta(minutes=token_time))
+        to_encode.update({"exp": expire, "iat": issued_at})
+        return jwt.encode(
+            to_encode,
+            token_key.signing_key,
+            algorithm=token_key.algorithm,
+            headers={"kid": token_key.kid},
         )
-        to_encode.update({"exp": expire})
-        return jwt.encode(to_encode, token_key, algorithm=settings.ALGORITHM)
 
     @staticmethod
     async def decode_jwt_token(token: str, token_type: str) -> dict[str, str]:
+        JWT.reload_keys_if_changed()
         if token_type == "access":
-            token_key = settings.SECRET_KEY_FOR_ACCESS
-        else:
-            token_key = (settings.SECRET_KEY_FOR_REFRESH,)
+            cache_key = hashlib.sha256(token.encode()).digest()
+            cached_payload = decoded_access_token_cache.get(cache_key)
+            if cached_payload is not None:
+                return dict(cached_payload)
+            payload = expand_claims(await JWT._decode_jwt_token(token, token_type))
+            if "exp" in payload:
+                decoded_access_token_cache.set(
+                    cache_key, dict(payload), expires_at=payload["exp"]
+                )
+            return payload
+        return await JWT._decode_jwt_token(token, token_type)
+
+    @staticmethod
+    async def _decode_jwt_token(token: str, token_type: str) -> dict[str, str]:
+        key_ring = JWT.keys["access" if token_type == "access" else "refresh"]
+        payload = None
         try:
-            payload = jwt.decode(token, token_key, algorithms=[settings.ALGORITHM])
-            if "sub" not in payload.keys():
-                AppExceptions.unauthorized_exception("Could not validate credentials")
+            kid = jwt.get_unverified_header(token).get("kid")
         except JWTError:
             AppExceptions.unauthorized_exception("Could not validate credentials")
+        for token_key in key_ring.verification_keys(kid):
+            try:
+                payload = jwt.decode(
+                    token, token_key.verification_key, algorithms=[token_key.algorithm]
+                )
+                break
+            except JWTError:
+                continue
+        if payload is None or "sub" not in payload.keys():
+            AppExceptions.unauthorized_exception("Could not validate credentials")
         return payload
+
+
+JWT.load_keys()
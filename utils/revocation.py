@@ -0,0 +1,159 @@
+import datetime
+import hashlib
+import math
+import time
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import get_settings
+from db.dals import RevocationDAL
+from db.models import RevokedToken
+from db.session import transaction
+from utils.cursor import TrailingCursor
+
+settings = get_settings()
+
+
+class BloomFilter:
+    """Fixed size set membership filter without false negatives.
+
+    ``might_contain`` returns False only for keys that were never added, so a
+    negative answer needs no exact lookup.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationList:
+    """Per worker mirror of the revoked_tokens table.
+
+    Revoked jtis and users are kept in exact dicts and in a Bloom filter that
+    answers the common "not revoked" case without touching the dicts. Rows are
+    pulled incrementally by revocation_id, re-reading the last ``lookback``
+    seconds of ids so that revocations committed out of id order are not
+    missed; adding a row twice is a no-op. Expired entries are pruned and the
+    filter is rebuilt when it outgrows its capacity.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: float,
+        lookback: float = 0.0,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.lookback = lookback
+        self.clear()
+
+    def clear(self) -> None:
+        self._jtis: dict[str, float] = {}  # jti -> expires_at
+        self._users: dict[str, tuple[float, float]] = {}  # -> (revoked_at, exp)
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._cursor = TrailingCursor(self.lookback)
+        self._next_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._users)
+
+    def add(self, revocation: RevokedToken) -> None:
+        expires_at = revocation.expires_at.timestamp()
+        if revocation.jti is not None:
+            if revocation.jti not in self._jtis:
+                self._filter.add(f"jti:{revocation.jti}")
+            self._jtis[revocation.jti] = expires_at
+        if revocation.user_id is not None:
+            user_id = str(revocation.user_id)
+            revoked_at = revocation.revoked_at.timestamp()
+            previous = self._users.get(user_id)
+            if previous is None:
+                previous = (revoked_at, expires_at)
+                self._filter.add(f"user:{user_id}")
+            self._users[user_id] = (
+                max(previous[0], revoked_at),
+                max(previous[1], expires_at),
+            )
+        if self._filter.count > self._filter.capacity:
+            self._rebuild()
+
+    def is_revoked(self, payload: dict, user_id: UUID | str | None = None) -> bool:
+        """Whether the token with this payload was revoked by jti or by user"""
+        jti = payload.get("jti")
+        user_id = payload.get("user_id", user_id)
+        if jti is not None and self._filter.might_contain(f"jti:{jti}"):
+            if jti in self._jtis:
+                return True
+        if user_id is not None and self._filter.might_contain(f"user:{user_id}"):
+            revoked_user = self._users.get(str(user_id))
+            # Tokens without "iat" predate revocation support.
+            if revoked_user is not None and payload.get("iat", 0) <= revoked_user[0]:
+                return True
+        return False
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Load revocations added by other workers at most once per interval"""
+        if time.monotonic() < self._next_refresh:
+            return
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        now = datetime.datetime.now(datetime.timezone.utc)
+        async with transaction(session):
+            revocations = await RevocationDAL(session).get_revocations_after(
+                self._cursor.position, now
+            )
+        for revocation in revocations:
+            self.add(revocation)
+        self._cursor.advance(
+            max((revocation.revocation_id for revocation in revocations), default=0)
+        )
+        self._prune(now.timestamp())
+
+    def _prune(self, now: float) -> None:
+        size = len(self)
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._users = {
+            user_id: entry for user_id, entry in self._users.items() if entry[1] > now
+        }
+        if len(self) < size:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        capacity = max(self.capacity, 2 * len(self))
+        self._filter = BloomFilter(capacity, self.error_rate)
+        for jti in self._jtis:
+            self._filter.add(f"jti:{jti}")
+        for user_id in self._users:
+            self._filter.add(f"user:{user_id}")
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.REVOCATION_REFRESH_INTERVAL_SECONDS,
+    lookback=settings.REVOCATION_REFRESH_LOOKBACK_SECONDS,
+)
@@ -0,0 +1,37 @@
+import asyncio
+import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from api.core.logging.logging_app import logger
+from db.dals import RefreshTokenDAL
+
+
+async def sweep_expired_refresh_tokens(
+    session_factory: sessionmaker, batch_size: int
+) -> int:
+    """Delete expired refresh tokens in short transactions of batch_size rows"""
+    deleted = 0
+    now = datetime.datetime.now(datetime.timezone.utc)
+    while True:
+        session: AsyncSession
+        async with session_factory() as session:
+            async with session.begin():
+                batch = await RefreshTokenDAL(session).delete_expired(now, batch_size)
+        deleted += batch
+        if batch < batch_size:
+            return deleted
+
+
+async def run_refresh_token_sweeper(
+    session_factory: sessionmaker, interval: float, batch_size: int
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            deleted = await sweep_expired_refresh_tokens(session_factory, batch_size)
+        except Exception as err:
+            logger.error(f"Refresh store sweep failed: {err}")
+        else:
+            logger.info(f"Refresh store sweep deleted {deleted} expired rows")
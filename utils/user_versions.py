@@ -0,0 +1,79 @@
+import math
+import time
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import get_settings
+from db.dals import UserDAL
+from db.session import transaction
+from utils.cursor import TrailingCursor
+
+settings = get_settings()
+
+
+class UserVersionMap:
+    """Per worker map of user_id to the latest users.version.
+
+    Access tokens and cached claims carry the version they were built from;
+    an older version than the one in this map means the user has changed
+    since. The map is pulled incrementally by version, which comes from one
+    sequence shared by all user writes, re-reading the last ``lookback``
+    seconds of versions to catch writes committed out of order.
+
+    The first refresh starts from the highest version instead of loading
+    every user, so writes made before it are unknown. A token of a user not
+    in the map that was issued before the map became complete is treated as
+    stale.
+    """
+
+    def __init__(self, refresh_interval: float, lookback: float = 0.0):
+        self.refresh_interval = refresh_interval
+        self.lookback = lookback
+        self.clear()
+
+    def clear(self) -> None:
+        self._versions: dict[UUID, int] = {}
+        self._cursor: TrailingCursor | None = None
+        self._complete_since = math.inf
+        self._next_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def is_stale(
+        self, user_id: UUID | str, version: int | None, issued_at: float | None = None
+    ) -> bool:
+        known_version = self._versions.get(UUID(str(user_id)))
+        if known_version is None:
+            return issued_at is not None and issued_at < self._complete_since
+        return version is None or version < known_version
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Load user versions changed since the last refresh at most once per interval"""
+        if time.monotonic() < self._next_refresh:
+            return
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        async with transaction(session):
+            user_dal = UserDAL(session)
+            if self._cursor is None:
+                max_version = await user_dal.get_max_user_version()
+                changed = []
+            else:
+                changed = await user_dal.get_user_versions_after(
+                    self._cursor.position
+                )
+        if self._cursor is None:
+            self._cursor = TrailingCursor(self.lookback, start=max_version)
+            # Writes taken before max_version may still commit within lookback.
+            self._complete_since = time.time() + self.lookback
+            return
+        for user_id, version in changed:
+            self._versions[user_id] = max(self._versions.get(user_id, 0), version)
+        self._cursor.advance(max((version for _, version in changed), default=0))
+
+
+user_versions = UserVersionMap(
+    refresh_interval=settings.USER_VERSIONS_REFRESH_INTERVAL_SECONDS,
+    lookback=settings.USER_VERSIONS_REFRESH_LOOKBACK_SECONDS,
+)
@@ -0,0 +1,106 @@
+import asyncio
+import math
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from api.core.exceptions import AppExceptions
+from api.core.logging.logging_app import logger
+from api.core.metrics import WRITE_BEHIND_BATCH_SIZE
+from api.core.metrics import WRITE_BEHIND_FLUSH_SECONDS
+from api.core.metrics import WRITE_BEHIND_OVERFLOWS
+from api.core.metrics import WRITE_BEHIND_PENDING
+from api.core.metrics import WRITE_BEHIND_REJECTED
+
+
+class WriteBehindBuffer:
+    """Coalesces writes per key in memory and applies them in batches.
+
+    Writes to the same key merge, the latest value of each field winning,
+    so a burst of changes to one row costs one row in the next batch. The
+    background ``run`` loop flushes the buffer every ``flush_interval``
+    seconds, and early once it holds ``max_entries`` keys. While flushes
+    fail the buffer grows up to ``max_pending`` keys; writes of further keys
+    are then refused with 503 rather than accepted and lost.
+
+    Durability: buffered writes live only in this worker process. They are
+    lost if it dies before the next flush, and are not visible to reads
+    until flushed. A batch that fails is put back, without overriding newer
+    writes, and retried on the next flush. Call ``flush`` on shutdown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        session_factory: sessionmaker,
+        apply: Callable[[AsyncSession, dict], Awaitable[int]],
+        max_entries: int,
+        max_pending: int,
+        flush_interval: float,
+    ):
+        self.name = name
+        self.session_factory = session_factory
+        self.apply = apply
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[Hashable, dict] = {}
+        self._lock = asyncio.Lock()
+        self._full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: Hashable, changes: dict) -> None:
+        if key not in self._pending and len(self._pending) >= self.max_pending:
+            WRITE_BEHIND_OVERFLOWS.labels(self.name).inc()
+            AppExceptions.service_unavailable_exception(
+                "Service is busy, please retry later.",
+                retry_after=math.ceil(self.flush_interval),
+            )
+        self._pending[key] = {**self._pending.get(key, {}), **changes}
+        WRITE_BEHIND_PENDING.labels(self.name).set(len(self._pending))
+        if len(self._pending) >= self.max_entries:
+            self._full.set()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            WRITE_BEHIND_PENDING.labels(self.name).set(0)
+            started = time.perf_counter()
+            try:
+                session: AsyncSession
+                async with self.session_factory() as session:
+                    async with session.begin():
+                        applied = await self.apply(session, batch)
+            except BaseException:
+                for key, changes in batch.items():
+                    self._pending[key] = {**changes, **self._pending.get(key, {})}
+                WRITE_BEHIND_PENDING.labels(self.name).set(len(self._pending))
+                raise
+            finally:
+                WRITE_BEHIND_FLUSH_SECONDS.labels(self.name).observe(
+                    time.perf_counter() - started
+                )
+            WRITE_BEHIND_BATCH_SIZE.labels(self.name).observe(len(batch))
+            WRITE_BEHIND_REJECTED.labels(self.name).inc(len(batch) - applied)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as err:
+                logger.error(f"Write-behind flush of {self.name} failed: {err}")
+                # Back off instead of retrying on every write to a full buffer.
+                await asyncio.sleep(self.flush_interval)